@@ -1,5 +1,6 @@
 from spreadsheet.cell import Cell
 from spreadsheet.baseSpreadsheet import BaseSpreadsheet
+from spreadsheet.valueIndex import ValueIndex
 
 
 # ------------------------------------------------------------------------
@@ -12,25 +13,46 @@ from spreadsheet.baseSpreadsheet import BaseSpreadsheet
 
 class ArraySpreadsheet(BaseSpreadsheet):
 
-    def __init__(self):
+    def __init__(self, indexed: bool = False):
+        """
+        @param indexed: if True, keep a value index so find() doesn't scan every cell.
+        """
+        # grid of values (None for an empty cell); a cell's row and column are its position in the grid
         self.spreadsheet = []
+        self.numCols = 0
+        # every row list is colCapacity long and is a gap buffer: the spare slots (always None) sit in a
+        # gap starting at column gapStart, which all rows share. Column j is at row[j] before the gap and
+        # row[j + gap size] after it, so inserting columns near the gap only moves the cells in between.
+        self.colCapacity = 0
+        self.gapStart = 0
+        self.valueIndex = ValueIndex() if indexed else None
 
     def buildSpreadsheet(self, lCells: [Cell]):  # type: ignore
         """
         Construct the data structure to store nodes.
         @param lCells: list of cells to be stored
         """
-        # look at all the cells
-        # for each cell, check if the row and column are in the spreadsheet
-        # if so, update the cell
-        # if not, create enough rows and columns to fit the cell
+        if not lCells:
+            return
+
+        # one scan for the size, so the grid is allocated once instead of row by row and column by column
+        numRows = max(self.rowNum(), max(cell.row for cell in lCells) + 1)
+        numCols = max(self.numCols, max(cell.col for cell in lCells) + 1)
+        # with the gap at the end, columns are where they appear to be
+        self._moveGap(self.numCols)
+        if numCols > self.colCapacity:
+            self._growCols(numCols)
+        self.numCols = numCols
+        self.gapStart = numCols
+        while self.rowNum() < numRows:
+            self.spreadsheet.append([None] * self.colCapacity)
+
+        # then write the values straight into the grid
         for cell in lCells:
-            if cell.row >= self.rowNum() or cell.col >= self.colNum():
-                while cell.row >= self.rowNum():
-                    self.appendRow()
-                while cell.col >= self.colNum():
-                    self.appendCol()
-            self.update(cell.row, cell.col, cell.val)
+            self.spreadsheet[cell.row][cell.col] = cell.val
+
+        if self.valueIndex is not None:
+            self.valueIndex.build(self.entries())
 
     def appendRow(self) -> bool:
         """
@@ -38,10 +60,7 @@ class ArraySpreadsheet(BaseSpreadsheet):
 
         @return True if operation was successful, or False if not.
         """
-        if self.rowNum() == 0:
-            self.spreadsheet.append([])
-        else:
-            self.spreadsheet.append([None] * self.colNum())
+        self.spreadsheet.append([None] * self.colCapacity)
         return True
 
     def appendCol(self) -> bool:
@@ -50,10 +69,7 @@ class ArraySpreadsheet(BaseSpreadsheet):
 
         @return True if operation was successful, or False if not.
         """
-
-        for row in self.spreadsheet:
-            row.append(None)
-        return True
+        return self.insertCol(self.numCols)
 
     def insertRow(self, rowIndex: int) -> bool:
         """
@@ -66,17 +82,9 @@ class ArraySpreadsheet(BaseSpreadsheet):
 
         if rowIndex < 0 or rowIndex > self.rowNum():
             return False
-        if self.rowNum() == 0:
-            self.spreadsheet.append([])
-        else:
-            self.spreadsheet.insert(rowIndex, [None] * self.colNum())
-        # add one to row values of all cells below the inserted row
-        i = rowIndex + 1
-        while i < self.rowNum():
-            for j in range(self.colNum()):
-                if self.spreadsheet[i][j] is not None:
-                    self.spreadsheet[i][j].row += 1
-            i += 1
+        self.spreadsheet.insert(rowIndex, [None] * self.colCapacity)
+        if self.valueIndex is not None:
+            self.valueIndex.shiftRows(rowIndex)
         return True
 
     def insertCol(self, colIndex: int) -> bool:
@@ -90,15 +98,46 @@ class ArraySpreadsheet(BaseSpreadsheet):
 
         if colIndex < 0 or colIndex > self.colNum():
             return False
-        for row in self.spreadsheet:
-            row.insert(colIndex, None)
-        # add one to col values of all cells to the right of the inserted column
-        j = colIndex + 1
-        while j < self.colNum():
-            for i in range(self.rowNum()):
-                if self.spreadsheet[i][j] is not None:
-                    self.spreadsheet[i][j].col += 1
-            j += 1
+        if self.numCols == self.colCapacity:
+            self._growCols(self.numCols + 1)
+        # bring the gap to the new column, and the new column is the first (empty) slot of the gap
+        self._moveGap(colIndex)
+        self.gapStart += 1
+        self.numCols += 1
+        if self.valueIndex is not None:
+            self.valueIndex.shiftCols(colIndex)
+        return True
+
+    def insertRows(self, rowIndex: int, count: int) -> bool:
+        """
+        Inserts count empty rows into the spreadsheet, as if insertRow(rowIndex) was called count times.
+
+        @return True if operation was successful, or False if not, e.g., rowIndex or count is invalid.
+        """
+        if count < 1 or rowIndex < 0 or rowIndex > self.rowNum():
+            return False
+        # one splice moves the rows after rowIndex once for the whole block
+        self.spreadsheet[rowIndex:rowIndex] = [[None] * self.colCapacity for _ in range(count)]
+        if self.valueIndex is not None:
+            self.valueIndex.shiftRows(rowIndex, count)
+        return True
+
+    def insertCols(self, colIndex: int, count: int) -> bool:
+        """
+        Inserts count empty columns into the spreadsheet, as if insertCol(colIndex) was called count times.
+
+        @return True if operation was successful, or False if not, e.g., colIndex or count is invalid.
+        """
+        if count < 1 or colIndex < 0 or colIndex > self.colNum():
+            return False
+        if self.numCols + count > self.colCapacity:
+            self._growCols(self.numCols + count)
+        # one gap move, then the new columns are the first count (empty) slots of the gap
+        self._moveGap(colIndex)
+        self.gapStart += count
+        self.numCols += count
+        if self.valueIndex is not None:
+            self.valueIndex.shiftCols(colIndex, count)
         return True
 
     def update(self, rowIndex: int, colIndex: int, value: float) -> bool:
@@ -114,9 +153,43 @@ class ArraySpreadsheet(BaseSpreadsheet):
 
         if rowIndex < 0 or rowIndex >= self.rowNum() or colIndex < 0 or colIndex >= self.colNum():
             return False
-        self.spreadsheet[rowIndex][colIndex] = Cell(rowIndex, colIndex, value)
+        slot = colIndex
+        if colIndex >= self.gapStart:
+            slot += self.colCapacity - self.numCols
+        self.spreadsheet[rowIndex][slot] = value
+        if self.valueIndex is not None:
+            self.valueIndex.update(rowIndex, colIndex, value)
         return True
 
+    def updateMany(self, lCells: [Cell]) -> [bool]:  # type: ignore
+        """
+        Update many cells, as if update() was called for each in turn.
+
+        @param lCells: list of cells, each holding the row, column and value to update.
+
+        @return List with the result update() would have returned for each cell.
+        """
+        # the bounds and gap don't change during the batch, so work them out once and write straight into the grid
+        grid = self.spreadsheet
+        numRows = len(grid)
+        numCols = self.numCols
+        gapStart = self.gapStart
+        gapSize = self.colCapacity - numCols
+        results = []
+        for cell in lCells:
+            row = cell.row
+            col = cell.col
+            if row < 0 or row >= numRows or col < 0 or col >= numCols:
+                results.append(False)
+                continue
+            grid[row][col if col < gapStart else col + gapSize] = cell.val
+            results.append(True)
+        if self.valueIndex is not None:
+            for cell, result in zip(lCells, results):
+                if result:
+                    self.valueIndex.update(cell.row, cell.col, cell.val)
+        return results
+
     def rowNum(self) -> int:
         """
         @return Number of rows the spreadsheet has.
@@ -127,9 +200,7 @@ class ArraySpreadsheet(BaseSpreadsheet):
         """
         @return Number of column the spreadsheet has.
         """
-        if self.rowNum() == 0:
-            return 0
-        return len(self.spreadsheet[0])
+        return self.numCols
 
     def find(self, value: float) -> [(int, int)]:  # type: ignore
         """
@@ -139,10 +210,12 @@ class ArraySpreadsheet(BaseSpreadsheet):
 
         @return List of cells (row, col) that contains the input value.
             """
+        if self.valueIndex is not None:
+            return self.valueIndex.find(value)
         foundCells = []
-        for i in range(self.rowNum()):
-            for j in range(self.colNum()):
-                if self.spreadsheet[i][j] is not None and self.spreadsheet[i][j].val == value:
+        for i, row in enumerate(self.spreadsheet):
+            for j, val in enumerate(self._withoutGap(row)):
+                if val is not None and val == value:
                     foundCells.append((i, j))
         return foundCells
 
@@ -150,9 +223,52 @@ class ArraySpreadsheet(BaseSpreadsheet):
         """
         @return A list of cells that have values (i.e., all non None cells).
         """
+        # cells only exist here, built from each value's position in the grid
         cells = []
-        for i in range(self.rowNum()):
-            for j in range(self.colNum()):
-                if self.spreadsheet[i][j] is not None:
-                    cells.append(self.spreadsheet[i][j])
+        for i, row in enumerate(self.spreadsheet):
+            for j, val in enumerate(self._withoutGap(row)):
+                if val is not None:
+                    cells.append(Cell(i, j, val))
         return cells
+
+    def _growCols(self, minCapacity: int):
+        """
+        Make room for at least minCapacity columns, at least doubling the capacity
+        so that appending columns one at a time is amortised O(1) per row.
+        """
+        newCapacity = max(minCapacity, 2 * self.colCapacity)
+        extra = newCapacity - self.colCapacity
+        # widen the gap at its end
+        gapEnd = self.gapStart + self.colCapacity - self.numCols
+        for row in self.spreadsheet:
+            row[gapEnd:gapEnd] = [None] * extra
+        self.colCapacity = newCapacity
+
+    def _moveGap(self, colIndex: int):
+        """
+        Move the gap so it starts at column colIndex, shifting only the cells between the old and new position.
+        """
+        gap = self.colCapacity - self.numCols
+        start = self.gapStart
+        if colIndex == start or gap == 0:
+            self.gapStart = colIndex
+            return
+        if colIndex < start:
+            # cells colIndex..start-1 move right, past the gap
+            cleared = [None] * min(start - colIndex, gap)
+            for row in self.spreadsheet:
+                row[colIndex + gap:start + gap] = row[colIndex:start]
+                row[colIndex:colIndex + len(cleared)] = cleared
+        else:
+            # cells start..colIndex-1 (stored after the gap) move left, before it
+            cleared = [None] * min(colIndex - start, gap)
+            for row in self.spreadsheet:
+                row[start:colIndex] = row[start + gap:colIndex + gap]
+                row[colIndex + gap - len(cleared):colIndex + gap] = cleared
+        self.gapStart = colIndex
+
+    def _withoutGap(self, row: list) -> list:
+        """
+        @return The row's values in column order, without the gap.
+        """
+        return row[:self.gapStart] + row[self.gapStart + self.colCapacity - self.numCols:]
@@ -56,6 +56,34 @@ class BaseSpreadsheet:
 
         pass
 
+    def insertRows(self, rowIndex: int, count: int) -> bool:
+        """
+        Inserts count empty rows into the spreadsheet, as if insertRow(rowIndex) was called count times.
+
+        @param rowIndex Index as for insertRow().
+        @param count Number of rows to insert.
+
+        @return True if operation was successful, or False if not, e.g., rowIndex or count is invalid.
+        """
+
+        if count < 1:
+            return False
+        return all([self.insertRow(rowIndex) for _ in range(count)])
+
+    def insertCols(self, colIndex: int, count: int) -> bool:
+        """
+        Inserts count empty columns into the spreadsheet, as if insertCol(colIndex) was called count times.
+
+        @param colIndex Index as for insertCol().
+        @param count Number of columns to insert.
+
+        @return True if operation was successful, or False if not, e.g., colIndex or count is invalid.
+        """
+
+        if count < 1:
+            return False
+        return all([self.insertCol(colIndex) for _ in range(count)])
+
     def update(self, rowIndex: int, colIndex: int, value: float) -> bool:
         """
         Update the cell with the input/argument value.
@@ -69,6 +97,17 @@ class BaseSpreadsheet:
 
         pass
 
+    def updateMany(self, lCells: [Cell]) -> [bool]:  # type: ignore
+        """
+        Update many cells, as if update() was called for each in turn.
+
+        @param lCells: list of cells, each holding the row, column and value to update.
+
+        @return List with the result update() would have returned for each cell.
+        """
+
+        return [self.update(cell.row, cell.col, cell.val) for cell in lCells]
+
     def rowNum(self) -> int:
         """
         @return Number of rows the spreadsheet has.
@@ -157,6 +196,34 @@ class BaseSpreadsheet:
 
         pass
 
+    def insertRows(self, rowIndex: int, count: int) -> bool:
+        """
+        Inserts count empty rows into the spreadsheet, as if insertRow(rowIndex) was called count times.
+
+        @param rowIndex Index as for insertRow().
+        @param count Number of rows to insert.
+
+        @return True if operation was successful, or False if not, e.g., rowIndex or count is invalid.
+        """
+
+        if count < 1:
+            return False
+        return all([self.insertRow(rowIndex) for _ in range(count)])
+
+    def insertCols(self, colIndex: int, count: int) -> bool:
+        """
+        Inserts count empty columns into the spreadsheet, as if insertCol(colIndex) was called count times.
+
+        @param colIndex Index as for insertCol().
+        @param count Number of columns to insert.
+
+        @return True if operation was successful, or False if not, e.g., colIndex or count is invalid.
+        """
+
+        if count < 1:
+            return False
+        return all([self.insertCol(colIndex) for _ in range(count)])
+
     def update(self, rowIndex: int, colIndex: int, value: float) -> bool:
         """
         Update the cell with the input/argument value.
@@ -170,6 +237,17 @@ class BaseSpreadsheet:
 
         pass
 
+    def updateMany(self, lCells: [Cell]) -> [bool]:  # type: ignore
+        """
+        Update many cells, as if update() was called for each in turn.
+
+        @param lCells: list of cells, each holding the row, column and value to update.
+
+        @return List with the result update() would have returned for each cell.
+        """
+
+        return [self.update(cell.row, cell.col, cell.val) for cell in lCells]
+
     def rowNum(self) -> int:
         """
         @return Number of rows the spreadsheet has.
@@ -0,0 +1,212 @@
+from spreadsheet.cell import Cell
+from spreadsheet.csrSpreadsheet import CSRSpreadsheet
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# ------------------------------------------------------------------------
+# CSR spreadsheet with a write buffer in front of it.
+#
+# Updating a cell that is already stored is done in place. A new cell
+# would cost an insert into cola/vala plus a shift of filled, so instead it
+# goes into a small delta buffer (row -> {column label: value}). The buffer
+# is merged into cola/vala/filled in one linear pass once it holds
+# merge_threshold cells, or when a scan (find, entries) needs to see
+# everything. get() looks in both.
+# ------------------------------------------------------------------------
+
+# number of buffered cells that triggers a merge, unless told otherwise
+MERGE_THRESHOLD = 1024
+
+
+class BufferedCSRSpreadsheet(CSRSpreadsheet):
+
+    def __init__(self, typed: bool = False, indexed: bool = False, merge_threshold: int = MERGE_THRESHOLD):
+        """
+        @param typed: if True, cola/vala/filled are stored as array.array buffers.
+        @param indexed: if True, keep a value index so find() doesn't scan every cell.
+        @param merge_threshold: number of buffered cells at which the buffer is merged into the CSR arrays.
+        """
+        super().__init__(typed=typed, indexed=indexed)
+        self.merge_threshold = merge_threshold
+        self.delta: Dict[int, Dict[int, float]] = {}    # row -> {column label: value} for cells not yet in cola/vala
+        self.delta_size = 0                             # number of cells in delta
+
+
+    def buildSpreadsheet(self, lCells: List[Cell]):
+        """
+        Construct the data structure to store nodes.
+        @param lCells: list of cells to be stored
+        """
+        self.merge()
+        super().buildSpreadsheet(lCells)
+
+
+    def buildFromBatches(self, batches: Iterable[Tuple[Sequence[int], Sequence[int], Sequence[float]]]):
+        """
+        Construct the data structure from column batches, without making a Cell per cell.
+        @param batches: iterable of (rows, cols, values) sequences, e.g. from dataLoader.readBatches
+        """
+        self.merge()
+        super().buildFromBatches(batches)
+
+
+    def insertRow(self, rowIndex: int) -> bool:
+        """
+        Inserts an empty row into the spreadsheet.
+
+        @param rowIndex Index of the existing row to insert the new row AFTER.  If inserting as first row, specify rowIndex to be -1.
+
+        @return True if operation was successful, or False if not, e.g., rowIndex is invalid.
+        """
+        success = super().insertRow(rowIndex)
+        if success and self.delta:
+            # the buffer is small, so moving its rows along is cheap
+            self.delta = {(row + 1 if row >= rowIndex else row): cells for row, cells in self.delta.items()}
+        return success
+
+
+    def insertRows(self, rowIndex: int, count: int) -> bool:
+        """
+        Inserts count empty rows into the spreadsheet, as if insertRow(rowIndex) was called count times.
+
+        @return True if operation was successful, or False if not, e.g., rowIndex or count is invalid.
+        """
+        success = super().insertRows(rowIndex, count)
+        if success and self.delta:
+            self.delta = {(row + count if row >= rowIndex else row): cells for row, cells in self.delta.items()}
+        return success
+
+
+    def update(self, rowIndex: int, colIndex: int, value: float) -> bool:
+        """
+        Update the cell with the input/argument value.
+
+        @param rowIndex Index of row to update.
+        @param colIndex Index of column to update.
+        @param value Value to update.  Can assume they are floats.
+
+        @return True if cell can be updated.  False if cannot, e.g., row or column indices do not exist.
+        """
+        if rowIndex < 0 or colIndex < 0 or rowIndex >= self.num_rows() or colIndex >= self.num_cols:
+            return False
+
+        label = self.col_labels.label(colIndex)
+        index, found = self._locate(rowIndex, label)
+        if found:
+            self._materialise()
+            self.vala[index] = value
+        else:
+            # new cell, buffer it rather than shifting cola/vala/filled
+            pending = self.delta.setdefault(rowIndex, {})
+            if label not in pending:
+                self.delta_size += 1
+            pending[label] = value
+
+        if self.value_index is not None:
+            self.value_index.update(rowIndex, colIndex, value)
+        if self.delta_size >= self.merge_threshold:
+            self.merge()
+        return True
+
+
+    def updateMany(self, lCells: List[Cell]) -> List[bool]:
+        """
+        Update many cells, as if update() was called for each in turn.
+
+        @param lCells: list of cells, each holding the row, column and value to update.
+
+        @return List with the result update() would have returned for each cell.
+        """
+        # same as update(), with the bounds and labels looked up once: stored cells are written in
+        # place and new ones go into the buffer, which is merged only when it is full
+        num_rows = self.num_rows()
+        labels = self.col_labels.labels
+        results = []
+        for cell in lCells:
+            row = cell.row
+            col = cell.col
+            if row < 0 or col < 0 or row >= num_rows or col >= self.num_cols:
+                results.append(False)
+                continue
+            label = labels[col]
+            index, found = self._locate(row, label)
+            if found:
+                self._materialise()
+                self.vala[index] = cell.val
+            else:
+                pending = self.delta.setdefault(row, {})
+                if label not in pending:
+                    self.delta_size += 1
+                pending[label] = cell.val
+            if self.value_index is not None:
+                self.value_index.update(row, col, cell.val)
+            if self.delta_size >= self.merge_threshold:
+                self.merge()
+            results.append(True)
+        return results
+
+
+    def get(self, rowIndex: int, colIndex: int) -> Optional[float]:
+        """
+        Read the value of a single cell.
+
+        @param rowIndex Index of row to read.
+        @param colIndex Index of column to read.
+
+        @return Value of the cell, or None if the cell is empty or the indices do not exist.
+        """
+        pending = self.delta.get(rowIndex)
+        if pending and 0 <= colIndex < self.num_cols:
+            label = self.col_labels.label(colIndex)
+            if label in pending:
+                return pending[label]
+        return super().get(rowIndex, colIndex)
+
+
+    def find(self, value: float) -> List[Tuple[int, int]]:
+        """
+        Find and return a list of cells that contain the value 'value'.
+
+        @param value value to search for.
+
+        @return List of cells (row, col) that contains the input value.
+        """
+        # the value index already covers buffered cells
+        if self.value_index is None:
+            self.merge()
+        return super().find(value)
+
+
+    def entries(self) -> List[Cell]:
+        """
+        @return A list of cells that have values (i.e., all non None cells).
+        """
+        self.merge()
+        return super().entries()
+
+
+    def print_spreadsheet(self) -> None:
+        """
+        Prints the spreadsheet to the terminal.
+        """
+        self.merge()
+        super().print_spreadsheet()
+
+
+    def merge(self):
+        """
+        Merge the buffered cells into cola/vala/filled in one pass over the CSR arrays.
+        """
+        if not self.delta:
+            return
+        self._merge_rows(self.delta)
+        self.delta = {}
+        self.delta_size = 0
+
+
+    def _relabel_cols(self, relabelled: Dict[int, int]):
+        """
+        Rewrite the stored and buffered column labels after col_labels had to space its labels out again.
+        """
+        super()._relabel_cols(relabelled)
+        self.delta = {row: {relabelled[label]: value for label, value in cells.items()}
+                      for row, cells in self.delta.items()}
@@ -0,0 +1,209 @@
+from itertools import groupby
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, TextIO
+
+from spreadsheet.baseSpreadsheet import BaseSpreadsheet
+from spreadsheet.cell import Cell
+
+# ------------------------------------------------------------------------
+# Runs a command file against a spreadsheet.
+#
+# The command file is parsed into a stream of (opcode, argument) pairs,
+# with each run of consecutive commands of the same kind (e.g. U)
+# gathered into one entry, so the run is dispatched once; a run of
+# updates goes to the spreadsheet as one updateMany() call, and repeated
+# inserts at the same index as one insertRows()/insertCols() call.
+# Commands are dispatched through a table rather than an if/elif chain,
+# and output lines are collected and written in large chunks.
+#
+# IR and IC take an optional count ('IR 3 5' inserts 5 rows at index 3 in
+# one call) and report a single insertRows()/insertCols() call.
+# ------------------------------------------------------------------------
+
+# opcodes
+APPEND_ROW, APPEND_COL, INSERT_ROW, INSERT_COL, UPDATE, ROW_NUM, COL_NUM, FIND, ENTRIES, UNKNOWN = range(10)
+
+# command in a command file -> opcode
+OPCODES = {
+    'AR': APPEND_ROW,
+    'AC': APPEND_COL,
+    'IR': INSERT_ROW,
+    'IC': INSERT_COL,
+    'U': UPDATE,
+    'R': ROW_NUM,
+    'C': COL_NUM,
+    'F': FIND,
+    'E': ENTRIES
+}
+
+# opcodes whose consecutive commands are gathered into one entry
+RUN_OPCODES = {INSERT_ROW, INSERT_COL, UPDATE}
+
+# number of output lines collected before they are written
+FLUSH_LINES = 4096
+
+# most commands gathered into one run, so a long run of e.g. U commands is handled a block at a time
+MAX_RUN = FLUSH_LINES
+
+# (opcode, argument); for the opcodes in RUN_OPCODES the argument is the list of arguments of the run
+Command = Tuple[int, object]
+
+
+def parseCommands(lines: Iterable[str]) -> Iterator[Command]:
+    """
+    Parse a command file.
+
+    @param lines lines of the command file.
+
+    @return Iterator over (opcode, argument) commands, in file order. A run is
+        yielded once the next command of a different kind has been read, or
+        once it holds MAX_RUN commands.
+    """
+    run: Optional[Command] = None
+    for line in lines:
+        values = line.split()
+        if not values:
+            continue
+        opcode = OPCODES.get(values[0])
+        if opcode is None:
+            opcode = OPCODES.get(values[0].upper(), UNKNOWN)
+        if opcode == UPDATE:
+            argument = (int(values[1]), int(values[2]), float(values[3]))
+        elif opcode == INSERT_ROW or opcode == INSERT_COL:
+            # (index, count), count is None for a plain single insert
+            argument = (int(values[1]), int(values[2]) if len(values) > 2 else None)
+        elif opcode == FIND:
+            argument = float(values[1])
+        elif opcode == UNKNOWN:
+            argument = line
+        else:
+            argument = None
+
+        if run is not None and run[0] == opcode:
+            run[1].append(argument)
+            if len(run[1]) >= MAX_RUN:
+                yield run
+                run = None
+            continue
+        if run is not None:
+            yield run
+            run = None
+        if opcode in RUN_OPCODES:
+            run = (opcode, [argument])
+        else:
+            yield (opcode, argument)
+    if run is not None:
+        yield run
+
+
+class CommandEngine:
+
+    def __init__(self, spreadsheet: BaseSpreadsheet, outputFile: TextIO):
+        """
+        @param spreadsheet: spreadsheet to run the commands on.
+        @param outputFile: file the output of the commands is written to.
+        """
+        self.spreadsheet = spreadsheet
+        self.outputFile = outputFile
+        # output lines not written yet
+        self.output: List[str] = []
+        # opcode -> handler, each takes the command's argument
+        self.handlers = {
+            APPEND_ROW: self.appendRow,
+            APPEND_COL: self.appendCol,
+            INSERT_ROW: self.insertRows,
+            INSERT_COL: self.insertCols,
+            UPDATE: self.updates,
+            ROW_NUM: self.rowNum,
+            COL_NUM: self.colNum,
+            FIND: self.find,
+            ENTRIES: self.entries,
+            UNKNOWN: self.unknown
+        }
+
+    def run(self, commands: Iterable[Command]):
+        """
+        Run parsed commands, writing their output to the output file.
+        @param commands: commands from parseCommands()
+        """
+        handlers = self.handlers
+        output = self.output
+        for opcode, argument in commands:
+            handlers[opcode](argument)
+            if len(output) >= FLUSH_LINES:
+                self.flush()
+        self.flush()
+
+    def flush(self):
+        """
+        Write the collected output lines in one go.
+        """
+        if self.output:
+            self.outputFile.write(''.join(self.output))
+            self.output.clear()
+
+    # handlers, one per opcode, each collecting the output of its command(s)
+
+    def appendRow(self, argument: None):
+        self.output.append(f'Call to appendRow() returned {outcome(self.spreadsheet.appendRow())}.\n')
+
+    def appendCol(self, argument: None):
+        self.output.append(f'Call to appendCol() returned {outcome(self.spreadsheet.appendCol())}.\n')
+
+    def insertRows(self, inserts: List[Tuple[int, Optional[int]]]):
+        self.blockInserts(inserts, self.spreadsheet.insertRows, 'insertRow')
+
+    def insertCols(self, inserts: List[Tuple[int, Optional[int]]]):
+        self.blockInserts(inserts, self.spreadsheet.insertCols, 'insertCol')
+
+    def updates(self, cells: List[Tuple[int, int, float]]):
+        if len(cells) == 1:
+            # a lone update isn't worth building a batch for
+            results = [self.spreadsheet.update(*cells[0])]
+        else:
+            results = self.spreadsheet.updateMany([Cell(row, col, value) for row, col, value in cells])
+        self.output.extend(f'Call to update({row},{col},{value}) returned {outcome(result)}.\n'
+                           for (row, col, value), result in zip(cells, results))
+
+    def rowNum(self, argument: None):
+        self.output.append(f'Number of rows = {self.spreadsheet.rowNum()}\n')
+
+    def colNum(self, argument: None):
+        self.output.append(f'Number of columns = {self.spreadsheet.colNum()}\n')
+
+    def find(self, value: float):
+        cells = self.spreadsheet.find(value)
+        self.output.append(f'Printing output of find({value}): '
+                           + ' | '.join([f'({row},{col})' for row, col in cells]) + '\n')
+
+    def entries(self, argument: None):
+        cells = self.spreadsheet.entries()
+        self.output.append('Printing output of entries(): ' + ' | '.join([str(cell) for cell in cells]) + '\n')
+
+    def unknown(self, line: str):
+        print('Unknown command.')
+        print(line)
+
+    def blockInserts(self, inserts: List[Tuple[int, Optional[int]]], insertMany: Callable[[int, int], bool], name: str):
+        """
+        Run a run of IR or IC commands.
+
+        @param inserts: (index, count) of each command, count is None for a plain single insert.
+        @param insertMany: the spreadsheet's insertRows or insertCols.
+        @param name: name of the single insert method, as reported in the output.
+        """
+        for (index, count), group in groupby(inserts):
+            calls = sum(1 for _ in group)
+            if count is None:
+                # k single inserts at the same index are one block insert of k, and every call has its result
+                line = f'Call to {name}({index}) returned {outcome(insertMany(index, calls))}.\n'
+                self.output.extend([line] * calls)
+            else:
+                for _ in range(calls):
+                    self.output.append(f'Call to {name}s({index},{count}) returned {outcome(insertMany(index, count))}.\n')
+
+
+def outcome(result: bool) -> str:
+    """
+    @return How a call's result is reported in the output.
+    """
+    return 'success' if result else 'failure'
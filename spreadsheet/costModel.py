@@ -0,0 +1,211 @@
+import csv
+import glob
+import os
+from math import exp, log
+from typing import Dict, List, Optional, Tuple
+
+from spreadsheet.csrFile import is_csr_file, load_csr
+from spreadsheet.dataLoader import readBatches
+
+# ------------------------------------------------------------------------
+# Cost model for picking a spreadsheet implementation.
+#
+# Fitted from the results_*.csv files written by testing.py: for each
+# implementation and command, log(time) is fitted by least squares as a
+# linear function of log(rows), log(cols) and log(fill ratio). The time
+# of a whole run is predicted by adding up the predicted time of every
+# command in the command file, at the size of the data file.
+# ------------------------------------------------------------------------
+
+# testing.py times this many calls per row of results
+ITERATIONS = 100
+
+# benchmarked action (first word(s) of the csv 'action' column) -> command in a command file
+ACTION_COMMANDS = {
+    'find': 'F',
+    'insert: row': 'IR',
+    'insert: col': 'IC',
+    'update': 'U'
+}
+
+# implementation names used in the csv -> approach names used by spreadsheetFilebased.py
+APPROACHES = {
+    'linked_list': 'linkedlist'
+}
+
+
+class CostModel:
+
+    def __init__(self):
+        # (approach, command) -> least squares coefficients of log(time) on [1, log(rows), log(cols), log(filled)]
+        self.coefficients: Dict[Tuple[str, str], List[float]] = {}
+
+    def fit(self, filenames: List[str]):
+        """
+        Fit the model to benchmark results.
+        @param filenames: results csv files written by testing.py
+        """
+        samples: Dict[Tuple[str, str], List[Tuple[List[float], float]]] = {}
+        for filename in filenames:
+            with open(filename, newline='') as resultsFile:
+                for row in csv.DictReader(resultsFile):
+                    command = commandOf(row['action'])
+                    time = float(row['time'])
+                    if command is None or time <= 0:
+                        continue
+                    approach = APPROACHES.get(row['implementation'], row['implementation'])
+                    features = _features(int(row['num_rows']), int(row['num_cols']), float(row['filled']))
+                    samples.setdefault((approach, command), []).append((features, log(time / ITERATIONS)))
+
+        self.coefficients = {key: _leastSquares(points) for key, points in samples.items()}
+
+    def approaches(self) -> List[str]:
+        """
+        @return Approaches that have a fitted cost for every benchmarked command.
+        """
+        commands = set(ACTION_COMMANDS.values())
+        found = {approach for approach, _ in self.coefficients}
+        return sorted(approach for approach in found
+                      if all((approach, command) in self.coefficients for command in commands))
+
+    def predict(self, approach: str, command: str, numRows: int, numCols: int, filled: float) -> float:
+        """
+        @return Predicted time in seconds of one call of command, or 0.0 if the command wasn't benchmarked.
+        """
+        coefficients = self.coefficients.get((approach, command))
+        if coefficients is None:
+            return 0.0
+        features = _features(numRows, numCols, filled)
+        return exp(sum(c * x for c, x in zip(coefficients, features)))
+
+    def predictRun(self, approach: str, numRows: int, numCols: int, filled: float, commandCounts: Dict[str, int]) -> float:
+        """
+        @return Predicted time in seconds of running every command in commandCounts (command -> number of calls).
+        """
+        return sum(count * self.predict(approach, command, numRows, numCols, filled)
+                   for command, count in commandCounts.items())
+
+
+def commandOf(action: str) -> Optional[str]:
+    """
+    @return The command a benchmarked action times, or None if it isn't one of them.
+    """
+    for prefix, command in ACTION_COMMANDS.items():
+        if action.startswith(prefix):
+            return command
+    return None
+
+
+def scanData(filename: str) -> Tuple[int, int, float]:
+    """
+    Read a data file for its size.
+
+    The file is streamed a block at a time and only the largest row and column
+    and the number of lines are kept, so a cell given on more than one line is
+    counted more than once: the fill is an estimate, exact for files without
+    duplicate coordinates (as written by the data generator).
+
+    @return (number of rows, number of columns, fraction of cells filled).
+    """
+    if is_csr_file(filename):
+        # binary CSR file, the header has the size
+        csr = load_csr(filename)
+        size = csr.num_rows() * csr.num_cols
+        return (csr.num_rows(), csr.num_cols, len(csr.vala) / size if size else 0.0)
+
+    numRows = 0
+    numCols = 0
+    numCells = 0
+    for rows, cols, values in readBatches(filename):
+        if values:
+            numRows = max(numRows, max(rows) + 1)
+            numCols = max(numCols, max(cols) + 1)
+            numCells += len(values)
+    size = numRows * numCols
+    return (numRows, numCols, min(numCells / size, 1.0) if size else 0.0)
+
+
+def scanCommands(filename: str) -> Dict[str, int]:
+    """
+    Count the commands in a command file.
+
+    @return Dictionary from command (e.g. 'U') to the number of times it appears.
+        'IR i k' and 'IC i k' count as k inserts.
+    """
+    commandCounts: Dict[str, int] = {}
+    with open(filename, 'r') as commandFile:
+        for line in commandFile:
+            values = line.split()
+            if values:
+                command = values[0].upper()
+                calls = 1
+                if command in ('IR', 'IC') and len(values) > 2:
+                    # a block insert, costed as that many single inserts (at least one, even if it fails)
+                    calls = max(int(values[2]), 1)
+                commandCounts[command] = commandCounts.get(command, 0) + calls
+    return commandCounts
+
+
+def chooseApproach(dataFilename: str, commandFilename: str, resultsDir: str = '.') -> Optional[Tuple[str, float, Dict[str, float]]]:
+    """
+    Pick the approach predicted to run the commands on the data fastest.
+
+    @param dataFilename data file the spreadsheet will be built from.
+    @param commandFilename command file that will be run.
+    @param resultsDir directory holding the results_*.csv files to fit the model to.
+
+    @return (chosen approach, its predicted time, predicted time of every approach),
+        or None if there are no usable benchmark results.
+    """
+    model = CostModel()
+    model.fit(sorted(glob.glob(os.path.join(resultsDir, 'results_*.csv'))))
+    approaches = model.approaches()
+    if not approaches:
+        return None
+
+    (numRows, numCols, filled) = scanData(dataFilename)
+    commandCounts = scanCommands(commandFilename)
+    # the fit is in log space, so keep the size away from 0
+    numRows = max(numRows, 1)
+    numCols = max(numCols, 1)
+    filled = max(filled, 1.0 / (numRows * numCols))
+    costs = {approach: model.predictRun(approach, numRows, numCols, filled, commandCounts) for approach in approaches}
+    chosen = min(approaches, key=lambda approach: costs[approach])
+    return (chosen, costs[chosen], costs)
+
+
+def _features(numRows: int, numCols: int, filled: float) -> List[float]:
+    """
+    @return Regression inputs for a spreadsheet of the given size.
+    """
+    return [1.0, log(numRows), log(numCols), log(filled)]
+
+
+def _leastSquares(points: List[Tuple[List[float], float]]) -> List[float]:
+    """
+    Solve the normal equations (X^T X) b = X^T y by Gaussian elimination.
+
+    @param points: list of (features, y).
+
+    @return Coefficients b.
+    """
+    size = len(points[0][0])
+    # augmented matrix [X^T X | X^T y]; a tiny ridge keeps it solvable when a feature never varies
+    matrix = [[0.0] * (size + 1) for _ in range(size)]
+    for features, y in points:
+        for i in range(size):
+            for j in range(size):
+                matrix[i][j] += features[i] * features[j]
+            matrix[i][size] += features[i] * y
+    for i in range(size):
+        matrix[i][i] += 1e-9
+
+    for i in range(size):
+        pivot = max(range(i, size), key=lambda r: abs(matrix[r][i]))
+        matrix[i], matrix[pivot] = matrix[pivot], matrix[i]
+        for r in range(size):
+            if r != i and matrix[r][i] != 0.0:
+                factor = matrix[r][i] / matrix[i][i]
+                for c in range(i, size + 1):
+                    matrix[r][c] -= factor * matrix[i][c]
+    return [matrix[i][size] / matrix[i][i] for i in range(size)]
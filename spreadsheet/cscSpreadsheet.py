@@ -0,0 +1,472 @@
+from spreadsheet.baseSpreadsheet import BaseSpreadsheet
+from spreadsheet.cell import Cell
+from spreadsheet.csrSpreadsheet import CSRSpreadsheet, INDEX_TYPECODE, VALUE_TYPECODE
+from spreadsheet.labelMap import LabelMap, LABEL_GAP, WIDE_LABEL_GAP
+from spreadsheet.valueIndex import ValueIndex
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import compress, count, repeat
+from math import isclose
+from operator import add, mul
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+# ------------------------------------------------------------------------
+# Compressed sparse column (CSC) spreadsheet implementation.
+#
+# The column-major mirror of CSRSpreadsheet: rowa/vala hold the filled
+# cells one column after another, and filled holds the cumulative number
+# of cells at the start of each column. Rows are stored as labels from a
+# LabelMap, so inserting a row only adds a label, and inserting a column
+# is one insert into filled. to_csr()/from_csr() convert between the two
+# layouts in O(nnz + rows + cols).
+# ------------------------------------------------------------------------
+
+
+class CSCSpreadsheet(BaseSpreadsheet):
+
+    def __init__(self, typed: bool = False, indexed: bool = False):
+        """
+        @param typed: if True, rowa/vala/filled are stored as array.array buffers
+            (8 bytes per number) instead of lists of boxed ints and floats.
+        @param indexed: if True, keep a value index so find() doesn't scan every cell.
+        """
+        self.typed = typed
+        self.rowa = self._buffer(INDEX_TYPECODE)       # indicates which rows have values (as labels from row_labels)
+        self.vala = self._buffer(VALUE_TYPECODE)       # indicates the values for populated cells
+        self.filled = self._buffer(INDEX_TYPECODE)     # indicates the cumulative number of non-blank cells (first entry is 0, beginning of first column)
+        self.row_labels = self._label_map()    # stable label of each row, so inserting a row doesn't rewrite rowa
+        self.value_index = ValueIndex() if indexed else None
+
+
+    def buildSpreadsheet(self, lCells: List[Cell]):
+        """
+        Construct the data structure to store nodes.
+        @param lCells: list of cells to be stored
+        """
+        if not lCells:
+            return
+
+        # anything already stored goes in front, so the new cells overwrite it
+        cells = self.entries() + list(lCells) if self.vala else lCells
+
+        # column-major order; sort is stable, so duplicates stay in the order they were given
+        cells = sorted(cells, key=lambda cell: (cell.col, cell.row))
+
+        num_rows = max(max(cell.row for cell in cells) + 1, self.num_rows())
+        num_cols = max(cells[-1].col + 1, self.num_cols())
+        self._build(((cell.row, cell.col, cell.val) for cell in cells), num_rows, num_cols)
+
+
+    def buildFromBatches(self, batches: Iterable[Tuple[Sequence[int], Sequence[int], Sequence[float]]]):
+        """
+        Construct the data structure from column batches, without making a Cell per cell.
+        Every batch is gathered before the build (24 bytes a cell in three typed arrays, plus
+        the sort order), so peak memory still grows with the file; what it saves over
+        buildSpreadsheet() is the Cell object per cell.
+        @param batches: iterable of (rows, cols, values) sequences, e.g. from dataLoader.readBatches
+        """
+        # gather the batches into three compact columns, anything already stored goes in front
+        rows = array(INDEX_TYPECODE)
+        cols = array(INDEX_TYPECODE)
+        vals = array(VALUE_TYPECODE)
+        if self.vala:
+            existing = self.entries()
+            rows.extend(cell.row for cell in existing)
+            cols.extend(cell.col for cell in existing)
+            vals.extend(cell.val for cell in existing)
+        for batch_rows, batch_cols, batch_vals in batches:
+            rows.extend(batch_rows)
+            cols.extend(batch_cols)
+            vals.extend(batch_vals)
+        if not vals:
+            return
+
+        num_rows = max(max(rows) + 1, self.num_rows())
+        num_cols = max(max(cols) + 1, self.num_cols())
+
+        # column-major order; sorted() is stable, so duplicates stay in file order
+        keys = list(map(add, map(mul, cols, repeat(num_rows)), rows))
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        del keys
+        self._build(((rows[i], cols[i], vals[i]) for i in order), num_rows, num_cols)
+
+
+    @classmethod
+    def from_csr(cls, csr: CSRSpreadsheet) -> 'CSCSpreadsheet':
+        """
+        Convert a CSR spreadsheet in O(nnz + rows + cols).
+
+        @param csr spreadsheet to convert, left unchanged.
+
+        @return A new CSC spreadsheet holding the same cells, typed/indexed like csr.
+        """
+        csc = cls(typed=csr.typed, indexed=csr.value_index is not None)
+        num_rows = csr.num_rows()
+        num_cols = csr.num_cols
+        col_positions = csr.col_labels.positions()
+
+        # count the cells of each column, then drop every cell into its column's slot;
+        # rows are visited in order, so each column comes out sorted by row
+        col_counts = [0] * num_cols
+        for label in csr.cola:
+            col_counts[col_positions[label]] += 1
+        filled = csc._cumulative(col_counts)
+        next_slot = list(filled[:num_cols])
+        rowa = csc._buffer(INDEX_TYPECODE, [0]) * len(csr.vala)
+        vala = csc._buffer(VALUE_TYPECODE, [0.0]) * len(csr.vala)
+        row_labels = csc._label_map(num_rows)
+        for row in range(num_rows):
+            row_label = row_labels.labels[row]
+            for index in range(csr.filled[row], csr.filled[row + 1]):
+                col = col_positions[csr.cola[index]]
+                slot = next_slot[col]
+                rowa[slot] = row_label
+                vala[slot] = csr.vala[index]
+                next_slot[col] = slot + 1
+
+        csc.rowa = rowa
+        csc.vala = vala
+        csc.filled = filled
+        csc.row_labels = row_labels
+        if csc.value_index is not None:
+            csc.value_index.build(csc.entries())
+        return csc
+
+
+    def to_csr(self) -> CSRSpreadsheet:
+        """
+        Convert to a CSR spreadsheet in O(nnz + rows + cols).
+
+        @return A new CSR spreadsheet holding the same cells, typed/indexed like this one.
+        """
+        csr = CSRSpreadsheet(typed=self.typed, indexed=self.value_index is not None)
+        num_rows = self.num_rows()
+        num_cols = self.num_cols()
+        row_positions = self.row_labels.positions()
+
+        # same counting pass as from_csr, with rows and columns swapped
+        row_counts = [0] * num_rows
+        for label in self.rowa:
+            row_counts[row_positions[label]] += 1
+        filled = self._cumulative(row_counts)
+        next_slot = list(filled[:num_rows])
+        cola = csr._buffer(INDEX_TYPECODE, [0]) * len(self.vala)
+        vala = csr._buffer(VALUE_TYPECODE, [0.0]) * len(self.vala)
+        col_labels = csr._label_map(num_cols)
+        for col in range(num_cols):
+            col_label = col_labels.labels[col]
+            for index in range(self.filled[col], self.filled[col + 1]):
+                row = row_positions[self.rowa[index]]
+                slot = next_slot[row]
+                cola[slot] = col_label
+                vala[slot] = self.vala[index]
+                next_slot[row] = slot + 1
+
+        csr.cola = cola
+        csr.vala = vala
+        csr.filled = filled
+        csr.num_cols = num_cols
+        csr.col_labels = col_labels
+        if csr.value_index is not None:
+            csr.value_index.build(csr.entries())
+        return csr
+
+
+    def appendRow(self):
+        """
+        Appends an empty row to the spreadsheet.
+
+        @return True if operation was successful, or False if not.
+        """
+        self.row_labels.append()
+        return True
+
+
+    def appendCol(self):
+        """
+        Appends an empty column to the spreadsheet.
+
+        @return True if operation was successful, or False if not.
+        """
+        if not self.filled:
+            self.filled.append(0)
+        self.filled.append(self.filled[-1])
+        return True
+
+
+    def insertRow(self, rowIndex: int)->bool:
+        """
+        Inserts an empty row into the spreadsheet.
+
+        @param rowIndex Index of the existing row to insert the new row AFTER.  If inserting as first row, specify rowIndex to be -1.
+
+        @return True if operation was successful, or False if not, e.g., rowIndex is invalid.
+
+        Cost: as CSRSpreadsheet.insertCol(), amortised O(rows + nnz / log2(gap)) with rowa in place of cola.
+        """
+        success = False
+        if rowIndex == -1:
+            self.appendRow()
+        elif 0 <= rowIndex < self.num_rows():
+            # rowa holds labels, so it only changes if the labels had to be spaced out again
+            relabelled = self.row_labels.insert(rowIndex)
+            if relabelled:
+                self.rowa = self._buffer(INDEX_TYPECODE, [relabelled[label] for label in self.rowa])
+            if self.value_index is not None:
+                self.value_index.shiftRows(rowIndex)
+            success = True
+        return success
+
+
+    def insertCol(self, colIndex: int)->bool:
+        """
+        Inserts an empty column into the spreadsheet.
+
+        @param colIndex Index of the existing column to insert the new column  AFTER. If inserting as first row, specify colIndex to be -1.
+
+        return True if operation was successful, or False if not, e.g., colIndex is invalid.
+        """
+        success = False
+        if colIndex == -1:
+            self.appendCol()
+        elif 0 <= colIndex < self.num_cols():
+            filled_cells = self.filled[colIndex]
+            self.filled.insert(colIndex, filled_cells)  # python insert is BEFORE index
+            if self.value_index is not None:
+                self.value_index.shiftCols(colIndex)
+            success = True
+        return success
+
+
+    def insertRows(self, rowIndex: int, count: int) -> bool:
+        """
+        Inserts count empty rows into the spreadsheet, as if insertRow(rowIndex) was called count times.
+
+        @return True if operation was successful, or False if not, e.g., rowIndex or count is invalid.
+        """
+        success = False
+        if count < 1:
+            return success
+        if rowIndex == -1:
+            for _ in range(count):
+                self.appendRow()
+        elif 0 <= rowIndex < self.num_rows():
+            # all the new labels are handed out at once, so rowa is rewritten at most once
+            relabelled = self.row_labels.insertMany(rowIndex, count)
+            if relabelled:
+                self.rowa = self._buffer(INDEX_TYPECODE, [relabelled[label] for label in self.rowa])
+            if self.value_index is not None:
+                self.value_index.shiftRows(rowIndex, count)
+            success = True
+        return success
+
+
+    def insertCols(self, colIndex: int, count: int) -> bool:
+        """
+        Inserts count empty columns into the spreadsheet, as if insertCol(colIndex) was called count times.
+
+        @return True if operation was successful, or False if not, e.g., colIndex or count is invalid.
+        """
+        success = False
+        if count < 1:
+            return success
+        if colIndex == -1:
+            for _ in range(count):
+                self.appendCol()
+        elif 0 <= colIndex < self.num_cols():
+            # one splice shifts filled once for the whole block
+            filled_cells = self.filled[colIndex]
+            self.filled[colIndex:colIndex] = self._buffer(INDEX_TYPECODE, repeat(filled_cells, count))
+            if self.value_index is not None:
+                self.value_index.shiftCols(colIndex, count)
+            success = True
+        return success
+
+
+    def update(self, rowIndex: int, colIndex: int, value: float) -> bool:
+        """
+        Update the cell with the input/argument value.
+
+        @param rowIndex Index of row to update.
+        @param colIndex Index of column to update.
+        @param value Value to update.  Can assume they are floats.
+
+        @return True if cell can be updated.  False if cannot, e.g., row or column indices do not exist.
+        """
+
+        if rowIndex < 0 or colIndex < 0 or rowIndex >= self.num_rows() or colIndex >= self.num_cols():
+            return False
+
+        label = self.row_labels.label(rowIndex)
+        index, found = self._locate(colIndex, label)
+
+        # now we know where we need to update/insert
+        if found:
+            self.vala[index] = value
+        else:
+            self.rowa.insert(index, label)
+            self.vala.insert(index, value)
+            for c in range(colIndex + 1, self.num_cols() + 1):
+                self.filled[c] += 1
+
+        if self.value_index is not None:
+            self.value_index.update(rowIndex, colIndex, value)
+        return True
+
+
+    def get(self, rowIndex: int, colIndex: int) -> Optional[float]:
+        """
+        Read the value of a single cell.
+
+        @param rowIndex Index of row to read.
+        @param colIndex Index of column to read.
+
+        @return Value of the cell, or None if the cell is empty or the indices do not exist.
+        """
+        if rowIndex < 0 or colIndex < 0 or rowIndex >= self.num_rows() or colIndex >= self.num_cols():
+            return None
+
+        index, found = self._locate(colIndex, self.row_labels.label(rowIndex))
+        return self.vala[index] if found else None
+
+
+    def rowNum(self)->int:
+        """
+        @return Number of rows the spreadsheet has.
+        """
+        return self.num_rows()
+
+
+    def colNum(self)->int:
+        """
+        @return Number of columns the spreadsheet has.
+        """
+        return self.num_cols()
+
+
+    def find(self, value: float) -> List[Tuple[int, int]]:
+        """
+        Find and return a list of cells that contain the value 'value'.
+
+        @param value value to search for.
+
+        @return List of cells (row, col) that contains the input value.
+        """
+        if self.value_index is not None:
+            return self.value_index.find(value)
+
+        # compare every stored value in one go, as CSRSpreadsheet.find does
+        hits = compress(count(), map(isclose, self.vala, repeat(value)))
+
+        # the column of each hit is the last column that starts at or before it in filled
+        cells_with_value = []
+        for index in hits:
+            col = bisect_right(self.filled, index) - 1
+            cells_with_value.append((self.row_labels.position(self.rowa[index]), col))
+
+        # hits come out column by column, callers expect row-major order
+        cells_with_value.sort()
+        return cells_with_value
+
+
+    def entries(self) -> List[Cell]:
+        """
+        @return A list of cells that have values (i.e., all non None cells).
+        """
+        # bucket the cells by row; columns are visited in order, so each bucket stays sorted by column
+        row_positions = self.row_labels.positions()
+        rows: List[List[Cell]] = [[] for _ in range(self.num_rows())]
+        for col in range(self.num_cols()):
+            for index in range(self.filled[col], self.filled[col + 1]):
+                row = row_positions[self.rowa[index]]
+                rows[row].append(Cell(row, col, self.vala[index]))
+
+        return [cell for row in rows for cell in row]
+
+
+    def _build(self, cells: Iterable[Tuple[int, int, float]], num_rows: int, num_cols: int):
+        """
+        Replace rowa/vala/filled with the given cells, in one pass.
+
+        @param cells (row, column, value) triples in column-major order; for duplicate coordinates the last one wins.
+        @param num_rows, num_cols size of the spreadsheet, at least big enough for every cell.
+        """
+        # rows get fresh labels, in order
+        row_labels = self._label_map(num_rows)
+        labels = row_labels.labels
+
+        # one pass to fill rowa/vala and count the cells in each column
+        rowa = self._buffer(INDEX_TYPECODE)
+        vala = self._buffer(VALUE_TYPECODE)
+        col_counts = [0] * num_cols
+        last_row = -1
+        last_col = -1
+        for row, col, val in cells:
+            if row == last_row and col == last_col:
+                # duplicate coordinates, last write wins
+                vala[-1] = val
+                continue
+            rowa.append(labels[row])
+            vala.append(val)
+            col_counts[col] += 1
+            last_row = row
+            last_col = col
+
+        self.rowa = rowa
+        self.vala = vala
+        self.filled = self._cumulative(col_counts)
+        self.row_labels = row_labels
+
+        if self.value_index is not None:
+            self.value_index.build(self.entries())
+
+
+    def _locate(self, colIndex: int, label: int) -> Tuple[int, bool]:
+        """
+        Find where the cell with row label 'label' is, or would go, in column colIndex.
+
+        @return (index into rowa/vala, whether the cell is stored there).
+        """
+        # labels are in row order, so bisect within the column's slice of rowa
+        filled_cells_by_end_of_col = self.filled[colIndex + 1]
+        index = bisect_left(self.rowa, label, self.filled[colIndex], filled_cells_by_end_of_col)
+        return index, index < filled_cells_by_end_of_col and self.rowa[index] == label
+
+
+    def _cumulative(self, counts: List[int]):
+        """
+        @return Buffer of cumulative sums of counts, starting with 0.
+        """
+        filled = self._buffer(INDEX_TYPECODE, [0]) * (len(counts) + 1)
+        for i in range(len(counts)):
+            filled[i + 1] = filled[i] + counts[i]
+        return filled
+
+
+    def _label_map(self, size: int = 0) -> LabelMap:
+        """
+        @return A LabelMap for size rows whose labels fit rowa: spaced LABEL_GAP apart for
+            typed buffers, WIDE_LABEL_GAP apart for lists (fewer relabels, see labelMap).
+        """
+        return LabelMap(size, LABEL_GAP if self.typed else WIDE_LABEL_GAP)
+
+
+    def _buffer(self, typecode: str, values: Tuple = ()):
+        """
+        @return A new list or typed buffer (depending on self.typed) holding values.
+        """
+        return array(typecode, values) if self.typed else list(values)
+
+
+    def num_rows(self) -> int:
+        """
+        @return Number of rows in the spreadsheet.
+        """
+        return len(self.row_labels)
+
+
+    def num_cols(self) -> int:
+        """
+        @return Number of columns in the spreadsheet.
+        """
+        return len(self.filled) - 1 if self.filled else 0
@@ -0,0 +1,131 @@
+import mmap
+import struct
+import sys
+from array import array
+from typing import List
+
+from spreadsheet.cell import Cell
+from spreadsheet.csrSpreadsheet import CSRSpreadsheet, INDEX_TYPECODE, VALUE_TYPECODE
+from spreadsheet.labelMap import LabelMap, LABEL_GAP
+
+# ------------------------------------------------------------------------
+# Binary file format for a CSR spreadsheet, loaded with mmap.
+#
+# Layout (all numbers 8 bytes, in the byte order of the machine that wrote
+# the file, which the header records):
+#
+#   header      magic, byte order, len(filled), num_cols, nnz
+#   filled      len(filled) signed ints
+#   col labels  num_cols signed ints
+#   cola        nnz signed ints (column labels)
+#   vala        nnz doubles
+#
+# load_csr() maps the file and hands the spreadsheet memoryviews over the
+# mapping, so nothing is parsed or copied when a sheet is opened. The
+# spreadsheet copies a buffer into its own memory the first time it has to
+# change it.
+#
+# Run as a script to convert a text data file:
+#   python -m spreadsheet.csrFile <data fileName> <binary fileName>
+# ------------------------------------------------------------------------
+
+MAGIC = b'CSRSHT01'
+HEADER = struct.Struct('=8s8sqqq')
+LITTLE = b'little\0\0'
+BIG = b'big\0\0\0\0\0'
+
+
+def is_csr_file(filename: str) -> bool:
+    """
+    @return True if the file starts with the binary CSR header.
+    """
+    with open(filename, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def save_csr(csr: CSRSpreadsheet, filename: str):
+    """
+    Write the spreadsheet in the binary CSR format.
+
+    @param csr spreadsheet to save.
+    @param filename file to write.
+    """
+    filled = array(INDEX_TYPECODE, csr.filled)
+    labels = csr.col_labels.labels
+    cola = csr.cola
+    if csr.col_labels.gap != LABEL_GAP:
+        # wide labels (from a list-backed sheet) don't fit 8 bytes, so the file gets them spaced LABEL_GAP apart
+        file_labels = LabelMap(len(labels)).labels
+        relabelled = dict(zip(labels, file_labels))
+        labels = file_labels
+        cola = [relabelled[label] for label in cola]
+    with open(filename, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, LITTLE if sys.byteorder == 'little' else BIG,
+                               len(filled), csr.num_cols, len(csr.vala)))
+        file.write(filled.tobytes())
+        file.write(array(INDEX_TYPECODE, labels).tobytes())
+        file.write(array(INDEX_TYPECODE, cola).tobytes())
+        file.write(array(VALUE_TYPECODE, csr.vala).tobytes())
+
+
+def load_csr(filename: str, typed: bool = True) -> CSRSpreadsheet:
+    """
+    Open a spreadsheet saved by save_csr() without parsing or copying it.
+
+    @param filename file to load.
+    @param typed: buffers the spreadsheet copies into when it is first changed are
+        array.array if True, lists if False (see CSRSpreadsheet).
+
+    @return A CSR spreadsheet reading from the mapped file.
+    """
+    with open(filename, 'rb') as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    (magic, byteorder, num_filled, num_cols, nnz) = HEADER.unpack_from(mapping)
+    if magic != MAGIC:
+        raise ValueError(f'{filename} is not a binary CSR file')
+    if byteorder != (LITTLE if sys.byteorder == 'little' else BIG):
+        raise ValueError(f'{filename} was written on a machine with a different byte order')
+
+    view = memoryview(mapping)
+    offset = HEADER.size
+
+    def take(count: int, typecode: str) -> memoryview:
+        nonlocal offset
+        start = offset
+        offset += 8 * count
+        return view[start:offset].cast(typecode)
+
+    csr = CSRSpreadsheet(typed=typed)
+    csr.filled = take(num_filled, INDEX_TYPECODE)
+    col_labels = LabelMap()
+    col_labels.labels = take(num_cols, INDEX_TYPECODE).tolist()
+    csr.cola = take(nnz, INDEX_TYPECODE)
+    csr.vala = take(nnz, VALUE_TYPECODE)
+    csr.num_cols = num_cols
+    csr.col_labels = col_labels
+    return csr
+
+
+def read_cells(filename: str) -> List[Cell]:
+    """
+    Read a text data file, one 'row col value' cell per line.
+
+    @return List of cells in the file.
+    """
+    cells = []
+    with open(filename, 'r') as data_file:
+        for line in data_file:
+            values = line.split()
+            cells.append(Cell(int(values[0]), int(values[1]), float(values[2])))
+    return cells
+
+
+if __name__ == '__main__':
+    args = sys.argv
+    if len(args) != 3:
+        print('python3 -m spreadsheet.csrFile <data fileName> <binary fileName>')
+        sys.exit(1)
+
+    csr = CSRSpreadsheet()
+    csr.buildSpreadsheet(read_cells(args[1]))
+    save_csr(csr, args[2])
@@ -1,7 +1,13 @@
 from spreadsheet.baseSpreadsheet import BaseSpreadsheet
 from spreadsheet.cell import Cell
+from spreadsheet.labelMap import LabelMap, LABEL_GAP, WIDE_LABEL_GAP
+from spreadsheet.valueIndex import ValueIndex
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import compress, count, islice, repeat
 from math import isclose
-from typing import List, Tuple
+from operator import add, le, mul
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 # ------------------------------------------------------------------------
 # This class is required TO BE IMPLEMENTED
@@ -11,13 +17,30 @@ from typing import List, Tuple
 # __copyright__ = 'Copyright 2023, RMIT University'
 # ------------------------------------------------------------------------
 
+# typecodes used when the CSR arrays are stored as typed buffers
+INDEX_TYPECODE = 'q'    # signed 64 bit, for cola and filled
+VALUE_TYPECODE = 'd'    # double, for vala
+
+# updateMany() merges its new cells in one pass once there are at least this many; a merge walks
+# every row, so below this inserting the cells one at a time is cheaper
+MERGE_MIN_CELLS = 32
+
+
 class CSRSpreadsheet(BaseSpreadsheet):
 
-    def __init__(self):
-        self.cola = []      # indicates which columns have values
-        self.vala = []      # indicates the values for populated cells
-        self.filled = []      # indicates the cumulative number of non-blank cells (first entry is 0, beginning of first row)
+    def __init__(self, typed: bool = False, indexed: bool = False):
+        """
+        @param typed: if True, cola/vala/filled are stored as array.array buffers
+            (8 bytes per number) instead of lists of boxed ints and floats.
+        @param indexed: if True, keep a value index so find() doesn't scan every cell.
+        """
+        self.typed = typed
+        self.cola = self._buffer(INDEX_TYPECODE)       # indicates which columns have values (as labels from col_labels)
+        self.vala = self._buffer(VALUE_TYPECODE)       # indicates the values for populated cells
+        self.filled = self._buffer(INDEX_TYPECODE)     # indicates the cumulative number of non-blank cells (first entry is 0, beginning of first row)
         self.num_cols = 0   # needed when empty columns are appended
+        self.col_labels = self._label_map()    # stable label of each column, so inserting a column doesn't rewrite cola
+        self.value_index = ValueIndex() if indexed else None
 
 
     def buildSpreadsheet(self, lCells: List[Cell]):
@@ -25,15 +48,69 @@ class CSRSpreadsheet(BaseSpreadsheet):
         Construct the data structure to store nodes.
         @param lCells: list of cells to be stored
         """
-        for cell in lCells:
-            while not self.update(cell.row, cell.col, cell.val):
-                # well, we gotta add the row or column.
-                if cell.row >= self.num_rows():
-                    self.appendRow()
-                if cell.col >= self.num_cols:
-                    self.appendCol()
+        if not lCells:
+            return
+
+        # anything already stored goes in front, so the new cells overwrite it
+        cells = self.entries() + list(lCells) if self.vala else lCells
+
+        # only sort if we have to (data files are usually written row by row)
+        in_order = True
+        for i in range(1, len(cells)):
+            previous = cells[i - 1]
+            current = cells[i]
+            if current.row < previous.row or (current.row == previous.row and current.col < previous.col):
+                in_order = False
+                break
+        if not in_order:
+            # sort is stable, so duplicates stay in the order they were given
+            cells = sorted(cells, key=lambda cell: (cell.row, cell.col))
+
+        num_rows = max(cells[-1].row + 1, self.num_rows())
+        num_cols = max(max(cell.col for cell in cells) + 1, self.num_cols)
+        self._build(((cell.row, cell.col, cell.val) for cell in cells), num_rows, num_cols)
+
+
+    def buildFromBatches(self, batches: Iterable[Tuple[Sequence[int], Sequence[int], Sequence[float]]]):
+        """
+        Construct the data structure from column batches, without making a Cell per cell.
+        Every batch is gathered before the build (24 bytes a cell in three typed arrays, plus
+        the sort order if the cells are not in row-major order), so peak memory still grows
+        with the file; what it saves over buildSpreadsheet() is the Cell object per cell.
+        @param batches: iterable of (rows, cols, values) sequences, e.g. from dataLoader.readBatches
+        """
+        # gather the batches into three compact columns, anything already stored goes in front
+        rows = array(INDEX_TYPECODE)
+        cols = array(INDEX_TYPECODE)
+        vals = array(VALUE_TYPECODE)
+        if self.vala:
+            existing = self.entries()
+            rows.extend(cell.row for cell in existing)
+            cols.extend(cell.col for cell in existing)
+            vals.extend(cell.val for cell in existing)
+        for batch_rows, batch_cols, batch_vals in batches:
+            rows.extend(batch_rows)
+            cols.extend(batch_cols)
+            vals.extend(batch_vals)
+        if not vals:
+            return
+
+        num_rows = max(max(rows) + 1, self.num_rows())
+        num_cols = max(max(cols) + 1, self.num_cols)
+
+        # only sort if we have to (data files are usually written row by row); the check compares
+        # each cell's row-major position with the next one's on the fly, without keeping them
+        positions = map(add, map(mul, rows, repeat(num_cols)), cols)
+        next_positions = map(add, map(mul, islice(rows, 1, None), repeat(num_cols)), islice(cols, 1, None))
+        if all(map(le, positions, next_positions)):
+            self._build(zip(rows, cols, vals), num_rows, num_cols)
+        else:
+            # sorted() is stable, so duplicates stay in file order
+            keys = list(map(add, map(mul, rows, repeat(num_cols)), cols))
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            del keys
+            self._build(((rows[i], cols[i], vals[i]) for i in order), num_rows, num_cols)
 
-        # self.print_spreadsheet()
 
     def appendRow(self):
         """
@@ -41,11 +118,11 @@ class CSRSpreadsheet(BaseSpreadsheet):
 
         @return True if operation was successful, or False if not.
         """
+        self._materialise()
         if not self.filled:
-            filled_cells = 0
-        else:
-            filled_cells = self.filled[-1] # if self.cnta else 0
-        self.filled.append(filled_cells)
+            # an empty sheet has no filled entries yet, start with the one for the beginning of the first row
+            self.filled.append(0)
+        self.filled.append(self.filled[-1])
         return True
 
 
@@ -55,6 +132,7 @@ class CSRSpreadsheet(BaseSpreadsheet):
 
         @return True if operation was successful, or False if not.
         """
+        self.col_labels.append()
         self.num_cols += 1
         return True
 
@@ -71,9 +149,12 @@ class CSRSpreadsheet(BaseSpreadsheet):
         if rowIndex == -1:
             self.appendRow()
         elif 0 <= rowIndex < self.num_rows():
+            self._materialise()
             end_of_row = rowIndex
             filled_cells = self.filled[end_of_row]
             self.filled.insert(end_of_row, filled_cells)  # python insert is BEFORE index
+            if self.value_index is not None:
+                self.value_index.shiftRows(rowIndex)
             success = True
         return success
 
@@ -85,16 +166,70 @@ class CSRSpreadsheet(BaseSpreadsheet):
         @param colIndex Index of the existing column to insert the new column  AFTER. If inserting as first row, specify colIndex to be -1.
 
         return True if operation was successful, or False if not, e.g., colIndex is invalid.
+
+        Cost: an O(cols) insert into the label list (a memmove), plus an O(nnz + cols) rewrite of cola
+        whenever the labels around colIndex run out of room. Inserting at the same place does that once
+        every log2(gap) inserts (32 typed, 128 with lists), so it is amortised O(cols + nnz / log2(gap)).
         """
         success = False
         if colIndex == -1:
             self.appendCol()
         # elif 0 <= colIndex <= self.num_cols:
         elif 0 <= colIndex < self.num_cols:
-            for index in range(0, len(self.cola)):
-                if self.cola[index] >= colIndex:
-                    self.cola[index] += 1
+            # cola holds labels, so it only changes if the labels had to be spaced out again
+            relabelled = self.col_labels.insert(colIndex)
+            if relabelled:
+                self._relabel_cols(relabelled)
             self.num_cols += 1
+            if self.value_index is not None:
+                self.value_index.shiftCols(colIndex)
+            success = True
+        return success
+
+
+    def insertRows(self, rowIndex: int, count: int) -> bool:
+        """
+        Inserts count empty rows into the spreadsheet, as if insertRow(rowIndex) was called count times.
+
+        @return True if operation was successful, or False if not, e.g., rowIndex or count is invalid.
+        """
+        success = False
+        if count < 1:
+            return success
+        if rowIndex == -1:
+            for _ in range(count):
+                self.appendRow()
+        elif 0 <= rowIndex < self.num_rows():
+            self._materialise()
+            # the new rows are empty, so they all repeat the count at the start of row rowIndex; one splice shifts filled once
+            filled_cells = self.filled[rowIndex]
+            self.filled[rowIndex:rowIndex] = self._buffer(INDEX_TYPECODE, repeat(filled_cells, count))
+            if self.value_index is not None:
+                self.value_index.shiftRows(rowIndex, count)
+            success = True
+        return success
+
+
+    def insertCols(self, colIndex: int, count: int) -> bool:
+        """
+        Inserts count empty columns into the spreadsheet, as if insertCol(colIndex) was called count times.
+
+        @return True if operation was successful, or False if not, e.g., colIndex or count is invalid.
+        """
+        success = False
+        if count < 1:
+            return success
+        if colIndex == -1:
+            for _ in range(count):
+                self.appendCol()
+        elif 0 <= colIndex < self.num_cols:
+            # all the new labels are handed out at once, so cola is rewritten at most once
+            relabelled = self.col_labels.insertMany(colIndex, count)
+            if relabelled:
+                self._relabel_cols(relabelled)
+            self.num_cols += count
+            if self.value_index is not None:
+                self.value_index.shiftCols(colIndex, count)
             success = True
         return success
 
@@ -110,40 +245,82 @@ class CSRSpreadsheet(BaseSpreadsheet):
         @return True if cell can be updated.  False if cannot, e.g., row or column indices do not exist.
         """
 
-        can_update = True
-        existing_cell = False
+        if rowIndex < 0 or colIndex < 0 or rowIndex >= self.num_rows() or colIndex >= self.num_cols:
+            return False
+
+        self._materialise()
+        label = self.col_labels.label(colIndex)
+        index, found = self._locate(rowIndex, label)
 
-        if (rowIndex >= self.num_rows()) or (colIndex >= self.num_cols):
-            can_update = False
-            # print('row or col out of bounds')
+        # now we know where we need to update/insert
+        if found:
+            self.vala[index] = value
         else:
-            # calculate index for cola/vala
-            filled_cells_at_start_of_row = self.filled[rowIndex]
-            filled_cells_by_end_of_row  = self.filled[rowIndex + 1]
-            index = filled_cells_at_start_of_row     # index into vals/cols at start of row
-            
-            while not (filled_cells_at_start_of_row == filled_cells_by_end_of_row == 0) \
-                  and index <= filled_cells_by_end_of_row \
-                  and self.cola \
-                  and index < len(self.cola) \
-                  and self.cola[index] <= colIndex:
-                if self.cola[index] == colIndex:
-                    existing_cell = True
-                    break
-                index += 1
-                        
-            # now we know where we need to update/delete/insert
-            if existing_cell:
-                old_value = self.vala[index]
-                difference = value - old_value
-                self.vala[index] = value
+            self._insert(index, rowIndex, label, value)
+
+        if self.value_index is not None:
+            self.value_index.update(rowIndex, colIndex, value)
+        return True
+
+
+    def updateMany(self, lCells: List[Cell]) -> List[bool]:
+        """
+        Update many cells, as if update() was called for each in turn.
+
+        @param lCells: list of cells, each holding the row, column and value to update.
+
+        @return List with the result update() would have returned for each cell.
+        """
+        self._materialise()
+        num_rows = self.num_rows()
+        labels = self.col_labels.labels
+        results = []
+        # cells that aren't stored yet wait here (last write wins), and go in together at the end
+        pending: Dict[int, Dict[int, float]] = {}
+        num_pending = 0
+        for cell in lCells:
+            row = cell.row
+            col = cell.col
+            if row < 0 or col < 0 or row >= num_rows or col >= self.num_cols:
+                results.append(False)
+                continue
+            label = labels[col]
+            index, found = self._locate(row, label)
+            if found:
+                self.vala[index] = cell.val
             else:
-                self.cola.insert(index, colIndex)
-                self.vala.insert(index, value)
-                for r in range(rowIndex + 1, self.num_rows() + 1):
-                    self.filled[r] += 1
+                row_cells = pending.setdefault(row, {})
+                if label not in row_cells:
+                    num_pending += 1
+                row_cells[label] = cell.val
+            if self.value_index is not None:
+                self.value_index.update(row, col, cell.val)
+            results.append(True)
+
+        if num_pending >= MERGE_MIN_CELLS:
+            self._merge_rows(pending)
+        else:
+            for row, row_cells in pending.items():
+                for label, value in row_cells.items():
+                    index, _ = self._locate(row, label)
+                    self._insert(index, row, label, value)
+        return results
+
+
+    def get(self, rowIndex: int, colIndex: int) -> Optional[float]:
+        """
+        Read the value of a single cell.
+
+        @param rowIndex Index of row to read.
+        @param colIndex Index of column to read.
+
+        @return Value of the cell, or None if the cell is empty or the indices do not exist.
+        """
+        if rowIndex < 0 or colIndex < 0 or rowIndex >= self.num_rows() or colIndex >= self.num_cols:
+            return None
 
-        return can_update
+        index, found = self._locate(rowIndex, self.col_labels.label(colIndex))
+        return self.vala[index] if found else None
 
 
     def rowNum(self)->int:
@@ -168,21 +345,19 @@ class CSRSpreadsheet(BaseSpreadsheet):
 
         @return List of cells (row, col) that contains the input value.
 	    """
+        if self.value_index is not None:
+            return self.value_index.find(value)
+
+        # compare every stored value in one go (map/compress run the loop in C),
+        # so the cost depends on the number of filled cells, not rows * cols
+        hits = compress(count(), map(isclose, self.vala, repeat(value)))
 
+        # vala is in row-major order, so the hits already come out in the right order;
+        # the row of each hit is the last row that starts at or before it in filled
         cells_with_value = []
-        col = 0
-        index = 0
-        filled_cells_so_far = 0
-        for r in range(0, self.num_rows()):
-            col = 0
-            while col < self.num_cols:
-                if filled_cells_so_far < self.filled[r+1] and self.cola[index] == col:
-                    if isclose(self.vala[index], value):
-                        cell = (r, col)
-                        cells_with_value.append(cell)
-                    index += 1
-                    filled_cells_so_far += 1
-                col += 1
+        for index in hits:
+            row = bisect_right(self.filled, index) - 1
+            cells_with_value.append((row, self.col_labels.position(self.cola[index])))
 
         return cells_with_value
 
@@ -192,6 +367,7 @@ class CSRSpreadsheet(BaseSpreadsheet):
         @return A list of cells that have values (i.e., all non None cells).
         """
         values = []
+        col_positions = self.col_labels.positions()
         filled_cells_so_far = 0
         row = 0
         index = 0
@@ -199,13 +375,160 @@ class CSRSpreadsheet(BaseSpreadsheet):
             while filled_cells_so_far == self.filled[row]:
                 row += 1
             filled_cells_so_far += 1
-            c = Cell(row - 1, self.cola[index], self.vala[index])
+            c = Cell(row - 1, col_positions[self.cola[index]], self.vala[index])
             values.append(c)
             index += 1
 
         return values
 
 
+    def _build(self, cells: Iterable[Tuple[int, int, float]], num_rows: int, num_cols: int):
+        """
+        Replace cola/vala/filled with the given cells, in one pass.
+
+        @param cells (row, column, value) triples in row-major order; for duplicate coordinates the last one wins.
+        @param num_rows, num_cols size of the spreadsheet, at least big enough for every cell.
+        """
+        # columns get fresh labels, in order
+        col_labels = self._label_map(num_cols)
+        labels = col_labels.labels
+
+        # one pass to fill cola/vala and count the cells in each row
+        cola = self._buffer(INDEX_TYPECODE)
+        vala = self._buffer(VALUE_TYPECODE)
+        row_counts = [0] * num_rows
+        last_row = -1
+        last_col = -1
+        for row, col, val in cells:
+            if row == last_row and col == last_col:
+                # duplicate coordinates, last write wins
+                vala[-1] = val
+                continue
+            cola.append(labels[col])
+            vala.append(val)
+            row_counts[row] += 1
+            last_row = row
+            last_col = col
+
+        # turn the row counts into the cumulative filled array
+        filled = self._buffer(INDEX_TYPECODE, [0]) * (num_rows + 1)
+        for r in range(num_rows):
+            filled[r + 1] = filled[r] + row_counts[r]
+
+        self.cola = cola
+        self.vala = vala
+        self.filled = filled
+        self.num_cols = num_cols
+        self.col_labels = col_labels
+
+        if self.value_index is not None:
+            self.value_index.build(self.entries())
+
+
+    def _merge_rows(self, pending: Dict[int, Dict[int, float]]):
+        """
+        Add new cells to cola/vala/filled in one pass over the CSR arrays.
+
+        @param pending row -> {column label: value} of cells that are not stored yet.
+        """
+        cola = self._buffer(INDEX_TYPECODE)
+        vala = self._buffer(VALUE_TYPECODE)
+        filled = self._buffer(INDEX_TYPECODE, [0])
+        for row in range(self.num_rows()):
+            start = self.filled[row]
+            end = self.filled[row + 1]
+            row_cells = pending.get(row)
+            if row_cells is None:
+                # untouched row, copy it across as a slice
+                cola.extend(self.cola[start:end])
+                vala.extend(self.vala[start:end])
+            else:
+                # a pending cell is never also stored, so the two sorted runs just interleave
+                index = start
+                for label in sorted(row_cells):
+                    while index < end and self.cola[index] < label:
+                        cola.append(self.cola[index])
+                        vala.append(self.vala[index])
+                        index += 1
+                    cola.append(label)
+                    vala.append(row_cells[label])
+                cola.extend(self.cola[index:end])
+                vala.extend(self.vala[index:end])
+            filled.append(len(cola))
+
+        self.cola = cola
+        self.vala = vala
+        self.filled = filled
+
+
+    def _insert(self, index: int, rowIndex: int, label: int, value: float):
+        """
+        Store a new cell at position index of cola/vala, which must be where _locate() says it goes in row rowIndex.
+        """
+        self.cola.insert(index, label)
+        self.vala.insert(index, value)
+        for r in range(rowIndex + 1, self.num_rows() + 1):
+            self.filled[r] += 1
+
+
+    def _locate(self, rowIndex: int, label: int) -> Tuple[int, bool]:
+        """
+        Find where the cell with column label 'label' is, or would go, in row rowIndex.
+
+        @return (index into cola/vala, whether the cell is stored there).
+        """
+        # labels are in column order, so bisect within the row's slice of cola
+        filled_cells_by_end_of_row = self.filled[rowIndex + 1]
+        index = bisect_left(self.cola, label, self.filled[rowIndex], filled_cells_by_end_of_row)
+        return index, index < filled_cells_by_end_of_row and self.cola[index] == label
+
+
+    def _relabel_cols(self, relabelled: Dict[int, int]):
+        """
+        Rewrite the stored column labels after col_labels had to space its labels out again.
+        """
+        self.cola = self._buffer(INDEX_TYPECODE, [relabelled[label] for label in self.cola])
+
+
+    def _materialise(self):
+        """
+        Copy cola/vala/filled into buffers of our own if they are read-only views
+        (e.g. of a file opened with csrFile.load_csr), so they can be changed.
+        """
+        if isinstance(self.filled, memoryview):
+            self.filled = self._copy(INDEX_TYPECODE, self.filled)
+        if isinstance(self.cola, memoryview):
+            self.cola = self._copy(INDEX_TYPECODE, self.cola)
+        if isinstance(self.vala, memoryview):
+            self.vala = self._copy(VALUE_TYPECODE, self.vala)
+
+
+    def _copy(self, typecode: str, view: memoryview):
+        """
+        @return A new list or typed buffer (depending on self.typed) holding the contents of view.
+        """
+        if not self.typed:
+            return view.tolist()
+        buffer = array(typecode)
+        buffer.frombytes(view.cast('B'))
+        return buffer
+
+
+    def _label_map(self, size: int = 0) -> LabelMap:
+        """
+        @return A LabelMap for size columns whose labels fit cola: spaced LABEL_GAP apart for
+            typed buffers, WIDE_LABEL_GAP apart for lists (fewer relabels, see labelMap).
+        """
+        return LabelMap(size, LABEL_GAP if self.typed else WIDE_LABEL_GAP)
+
+
+    def _buffer(self, typecode: str, values: Tuple = ()):
+        """
+        @return A new list or typed buffer (depending on self.typed) holding values.
+        """
+        return array(typecode, values) if self.typed else list(values)
+
+
     def num_rows(self) -> int:
         """
         @return Number of rows in the spreadsheet.
@@ -237,7 +560,7 @@ class CSRSpreadsheet(BaseSpreadsheet):
             print(r, '\t', end='')
             col = 0
             while col < self.num_cols:
-                if filled_cells_so_far < self.filled[r+1] and self.cola[index] == col:
+                if filled_cells_so_far < self.filled[r+1] and self.cola[index] == self.col_labels.label(col):
                     print(self.vala[index], end='\t')
                     index += 1
                     filled_cells_so_far += 1
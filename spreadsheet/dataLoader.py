@@ -0,0 +1,191 @@
+import os
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterator, List, Optional, Tuple
+
+from spreadsheet.cell import Cell
+from spreadsheet.baseSpreadsheet import BaseSpreadsheet
+
+# ------------------------------------------------------------------------
+# Streaming loader for text data files (one 'row col value' cell per line).
+#
+# The file is read in large blocks, and each block is parsed into three
+# typed columns (rows, cols, values) at once rather than line by line, so
+# no Cell object is made per line. Spreadsheets that have a
+# buildFromBatches(batches) method are handed the stream of column
+# batches; any other spreadsheet gets one buildSpreadsheet() call per
+# batch, so only one block of cells is held at a time.
+#
+# With more than one worker, the file is split at line boundaries into
+# chunks that are parsed in a process pool. Each worker leaves its columns
+# in a shared memory block and the batches are handed on in file order,
+# so the spreadsheet ends up exactly as it would from a serial load.
+# ------------------------------------------------------------------------
+
+# bytes read from the file at a time
+BLOCK_SIZE = 1 << 20
+
+# bytes of the file each worker parses at a time, when parsing in parallel
+CHUNK_SIZE = 16 << 20
+
+# (rows, cols, values) of a block of cells
+Batch = Tuple[array, array, array]
+
+
+def readBatches(filename: str, blockSize: int = BLOCK_SIZE) -> Iterator[Batch]:
+    """
+    Read a data file a block at a time.
+
+    @param filename data file to read.
+    @param blockSize number of bytes to read at a time.
+
+    @return Iterator over (rows, cols, values) batches, in file order.
+    """
+    with open(filename, 'rb') as dataFile:
+        leftover = b''
+        while True:
+            block = dataFile.read(blockSize)
+            if not block:
+                break
+            block = leftover + block
+            # only parse up to the last complete line, the rest goes in front of the next block
+            end = block.rfind(b'\n') + 1
+            leftover = block[end:]
+            if end:
+                yield parseBlock(block[:end])
+        if leftover.strip():
+            yield parseBlock(leftover)
+
+
+def parseBlock(block: bytes) -> Batch:
+    """
+    Parse whole lines of a data file.
+
+    @return (rows, cols, values) of the cells in block.
+    """
+    tokens = block.split()
+    if len(tokens) % 3 != 0:
+        raise ValueError('data file lines must have a row, a column and a value')
+    # every third token is a row, a column or a value, and int()/float() take bytes directly
+    return (array('q', map(int, tokens[0::3])),
+            array('q', map(int, tokens[1::3])),
+            array('d', map(float, tokens[2::3])))
+
+
+def readBatchesParallel(filename: str, workers: Optional[int] = None, chunkSize: int = CHUNK_SIZE) -> Iterator[Batch]:
+    """
+    Read a data file by parsing chunks of it in a pool of worker processes.
+
+    @param filename data file to read.
+    @param workers number of worker processes, None for one per CPU.
+    @param chunkSize number of bytes each worker parses at a time.
+
+    @return Iterator over (rows, cols, values) batches, in file order.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    chunks = chunkBounds(filename, chunkSize)
+    # start the tracker of shared memory blocks before the workers, so they share it
+    # rather than each starting their own that would free blocks we still need
+    resource_tracker.ensure_running()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # keep a couple of chunks per worker in flight, so parsed chunks don't pile up in memory
+        pending = deque()
+        for start, end in chunks:
+            pending.append(executor.submit(_parseChunk, filename, start, end))
+            if len(pending) >= 2 * workers:
+                yield _collect(*pending.popleft().result())
+        while pending:
+            yield _collect(*pending.popleft().result())
+
+
+def chunkBounds(filename: str, chunkSize: int = CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """
+    Split a data file into chunks of about chunkSize bytes that end at line boundaries.
+
+    @return List of (start, end) byte offsets, in file order.
+    """
+    size = os.path.getsize(filename)
+    bounds = []
+    start = 0
+    with open(filename, 'rb') as dataFile:
+        while start < size:
+            end = start + chunkSize
+            if end < size:
+                # move the end to just after the next newline
+                dataFile.seek(end - 1)
+                dataFile.readline()
+                end = dataFile.tell()
+            end = min(end, size)
+            bounds.append((start, end))
+            start = end
+    return bounds
+
+
+def _parseChunk(filename: str, start: int, end: int) -> Tuple[Optional[str], int]:
+    """
+    Parse the lines between two byte offsets of a data file, in a worker process.
+
+    @return (name of the shared memory block holding the rows, cols and values one
+        after another, number of cells), or (None, 0) if there are no cells.
+    """
+    with open(filename, 'rb') as dataFile:
+        dataFile.seek(start)
+        (rows, cols, values) = parseBlock(dataFile.read(end - start))
+    count = len(values)
+    if count == 0:
+        return (None, 0)
+    shared = SharedMemory(create=True, size=24 * count)
+    shared.buf[:8 * count] = memoryview(rows).cast('B')
+    shared.buf[8 * count:16 * count] = memoryview(cols).cast('B')
+    shared.buf[16 * count:24 * count] = memoryview(values).cast('B')
+    name = shared.name
+    shared.close()
+    return (name, count)
+
+
+def _collect(name: Optional[str], count: int) -> Batch:
+    """
+    Copy a worker's columns out of shared memory, and free it.
+
+    @return (rows, cols, values) of the cells the worker parsed.
+    """
+    rows = array('q')
+    cols = array('q')
+    values = array('d')
+    if name is None:
+        return (rows, cols, values)
+    shared = SharedMemory(name=name)
+    try:
+        with shared.buf[:24 * count] as buffer:
+            rows.frombytes(buffer[:8 * count])
+            cols.frombytes(buffer[8 * count:16 * count])
+            values.frombytes(buffer[16 * count:])
+    finally:
+        shared.close()
+        shared.unlink()
+    return (rows, cols, values)
+
+
+def loadSpreadsheet(spreadsheet: BaseSpreadsheet, filename: str, blockSize: int = BLOCK_SIZE, workers: Optional[int] = 1):
+    """
+    Build spreadsheet from a data file, without reading the whole file into memory first.
+
+    @param spreadsheet spreadsheet to build.
+    @param filename data file to read.
+    @param blockSize number of bytes to read at a time.
+    @param workers number of processes to parse with, None for one per CPU. With 1
+        the file is parsed in this process.
+    """
+    if workers == 1:
+        batches = readBatches(filename, blockSize)
+    else:
+        batches = readBatchesParallel(filename, workers)
+    if hasattr(spreadsheet, 'buildFromBatches'):
+        spreadsheet.buildFromBatches(batches)
+    else:
+        for rows, cols, values in batches:
+            spreadsheet.buildSpreadsheet(list(map(Cell, rows, cols, values)))
@@ -0,0 +1,270 @@
+from array import array
+from itertools import compress, count
+from typing import Optional
+
+from spreadsheet.cell import Cell
+from spreadsheet.baseSpreadsheet import BaseSpreadsheet
+from spreadsheet.valueIndex import ValueIndex
+
+
+# ------------------------------------------------------------------------
+# Dense spreadsheet implementation backed by flat typed buffers.
+#
+# All values live in one row-major array('d'), with an occupancy map
+# (one byte per cell, 1 = filled) saying which slots hold a value. There
+# is no object per cell, and find()/entries() run over the buffers in C.
+# ------------------------------------------------------------------------
+
+class DenseSpreadsheet(BaseSpreadsheet):
+
+    def __init__(self, indexed: bool = False):
+        """
+        @param indexed: if True, keep a value index so find() doesn't scan every cell.
+        """
+        self.numRows = 0
+        self.numCols = 0
+        # number of filled cells, kept up to date by every operation
+        self.numFilled = 0
+        # value of cell (i, j) is values[i * numCols + j], and is only meaningful if filled[i * numCols + j] is 1
+        self.values = array('d')
+        self.filled = bytearray()
+        self.valueIndex = ValueIndex() if indexed else None
+
+    def buildSpreadsheet(self, lCells: [Cell]):  # type: ignore
+        """
+        Construct the data structure to store nodes.
+        @param lCells: list of cells to be stored
+        """
+        if not lCells:
+            return
+        # allocate the whole grid once, then fill it
+        numRows = max(self.numRows, max(cell.row for cell in lCells) + 1)
+        numCols = max(self.numCols, max(cell.col for cell in lCells) + 1)
+        self._resize(numRows, numCols)
+        for cell in lCells:
+            index = cell.row * self.numCols + cell.col
+            self.values[index] = cell.val
+            self.filled[index] = 1
+        self.numFilled = self.filled.count(1)
+        if self.valueIndex is not None:
+            self.valueIndex.build(self.entries())
+
+    def appendRow(self) -> bool:
+        """
+        Appends an empty row to the spreadsheet.
+
+        @return True if operation was successful, or False if not.
+        """
+        self.values.extend(array('d', bytes(8 * self.numCols)))
+        self.filled.extend(bytes(self.numCols))
+        self.numRows += 1
+        return True
+
+    def appendCol(self) -> bool:
+        """
+        Appends an empty column to the spreadsheet.
+
+        @return True if operation was successful, or False if not.
+        """
+        self._spliceCol(self.numCols)
+        return True
+
+    def insertRow(self, rowIndex: int) -> bool:
+        """
+        Inserts an empty row into the spreadsheet.
+
+        @param rowIndex Index of the existing row that will be after the newly inserted row.  If inserting as first row, specify rowIndex to be 0.  If inserting a row after the last one, specify rowIndex to be rowNum()-1.
+
+        @return True if operation was successful, or False if not, e.g., rowIndex is invalid.
+        """
+        if rowIndex < 0 or rowIndex > self.numRows:
+            return False
+        start = rowIndex * self.numCols
+        self.values[start:start] = array('d', bytes(8 * self.numCols))
+        self.filled[start:start] = bytes(self.numCols)
+        self.numRows += 1
+        if self.valueIndex is not None:
+            self.valueIndex.shiftRows(rowIndex)
+        return True
+
+    def insertCol(self, colIndex: int) -> bool:
+        """
+        Inserts an empty column into the spreadsheet.
+
+        @param colIndex Index of the existing column that will be after the newly inserted row.  If inserting as first column, specify colIndex to be 0.  If inserting a column after the last one, specify colIndex to be colNum()-1.
+
+        return True if operation was successful, or False if not, e.g., colIndex is invalid.
+        """
+        if colIndex < 0 or colIndex > self.numCols:
+            return False
+        self._spliceCol(colIndex)
+        if self.valueIndex is not None:
+            self.valueIndex.shiftCols(colIndex)
+        return True
+
+    def insertRows(self, rowIndex: int, count: int) -> bool:
+        """
+        Inserts count empty rows into the spreadsheet, as if insertRow(rowIndex) was called count times.
+
+        @return True if operation was successful, or False if not, e.g., rowIndex or count is invalid.
+        """
+        if count < 1 or rowIndex < 0 or rowIndex > self.numRows:
+            return False
+        start = rowIndex * self.numCols
+        self.values[start:start] = array('d', bytes(8 * count * self.numCols))
+        self.filled[start:start] = bytes(count * self.numCols)
+        self.numRows += count
+        if self.valueIndex is not None:
+            self.valueIndex.shiftRows(rowIndex, count)
+        return True
+
+    def insertCols(self, colIndex: int, count: int) -> bool:
+        """
+        Inserts count empty columns into the spreadsheet, as if insertCol(colIndex) was called count times.
+
+        @return True if operation was successful, or False if not, e.g., colIndex or count is invalid.
+        """
+        if count < 1 or colIndex < 0 or colIndex > self.numCols:
+            return False
+        self._spliceCol(colIndex, count)
+        if self.valueIndex is not None:
+            self.valueIndex.shiftCols(colIndex, count)
+        return True
+
+    def update(self, rowIndex: int, colIndex: int, value: float) -> bool:
+        """
+        Update the cell with the input/argument value.
+
+        @param rowIndex Index of row to update.
+        @param colIndex Index of column to update.
+        @param value Value to update.  Can assume they are floats.
+
+        @return True if cell can be updated.  False if cannot, e.g., row or column indices do not exist.
+        """
+        if rowIndex < 0 or rowIndex >= self.numRows or colIndex < 0 or colIndex >= self.numCols:
+            return False
+        index = rowIndex * self.numCols + colIndex
+        if not self.filled[index]:
+            self.numFilled += 1
+        self.values[index] = value
+        self.filled[index] = 1
+        if self.valueIndex is not None:
+            self.valueIndex.update(rowIndex, colIndex, value)
+        return True
+
+    def get(self, rowIndex: int, colIndex: int) -> Optional[float]:
+        """
+        Read the value of a single cell.
+
+        @param rowIndex Index of row to read.
+        @param colIndex Index of column to read.
+
+        @return Value of the cell, or None if the cell is empty or the indices do not exist.
+        """
+        if rowIndex < 0 or rowIndex >= self.numRows or colIndex < 0 or colIndex >= self.numCols:
+            return None
+        index = rowIndex * self.numCols + colIndex
+        return self.values[index] if self.filled[index] else None
+
+    def rowNum(self) -> int:
+        """
+        @return Number of rows the spreadsheet has.
+        """
+        return self.numRows
+
+    def colNum(self) -> int:
+        """
+        @return Number of column the spreadsheet has.
+        """
+        return self.numCols
+
+    def nnz(self) -> int:
+        """
+        @return Number of cells that have values.
+        """
+        return self.numFilled
+
+    def find(self, value: float) -> [(int, int)]:  # type: ignore
+        """
+        Find and return a list of cells that contain the value 'value'.
+
+        @param value value to search for.
+
+        @return List of cells (row, col) that contains the input value.
+            """
+        if self.valueIndex is not None:
+            return self.valueIndex.find(value)
+        value = float(value)
+        if value != value:
+            # NaN never equals anything
+            return []
+        values = self.values
+        filled = self.filled
+        if value == 0.0:
+            # empty slots hold 0.0 as well, so only look at the filled ones
+            hits = [index for index in compress(count(), filled) if values[index] == 0.0]
+        else:
+            # array.index() compares whole doubles in C, so there are no unaligned matches to skip
+            hits = []
+            try:
+                index = values.index(value)
+                while True:
+                    if filled[index]:
+                        hits.append(index)
+                    index = values.index(value, index + 1)
+            except ValueError:
+                pass
+        return [(index // self.numCols, index % self.numCols) for index in hits]
+
+    def entries(self) -> [Cell]:  # type: ignore
+        """
+        @return A list of cells that have values (i.e., all non None cells).
+        """
+        numCols = self.numCols
+        return [Cell(index // numCols, index % numCols, self.values[index])
+                for index in compress(count(), self.filled)]
+
+    def _resize(self, numRows: int, numCols: int):
+        """
+        Grow the grid to numRows x numCols, keeping existing values where they are.
+        """
+        if numCols > self.numCols:
+            # new row stride, so copy each row into a fresh grid
+            oldCols = self.numCols
+            values = array('d', bytes(8 * self.numRows * numCols))
+            filled = bytearray(self.numRows * numCols)
+            for row in range(self.numRows):
+                values[row * numCols:row * numCols + oldCols] = self.values[row * oldCols:(row + 1) * oldCols]
+                filled[row * numCols:row * numCols + oldCols] = self.filled[row * oldCols:(row + 1) * oldCols]
+            self.values = values
+            self.filled = filled
+            self.numCols = numCols
+        if numRows > self.numRows:
+            extra = (numRows - self.numRows) * self.numCols
+            self.values.extend(array('d', bytes(8 * extra)))
+            self.filled.extend(bytes(extra))
+            self.numRows = numRows
+
+    def _spliceCol(self, colIndex: int, count: int = 1):
+        """
+        Rebuild the buffers with count empty columns at colIndex, copying a row segment at a time.
+        """
+        numCols = self.numCols
+        if numCols == 0:
+            # no row segments to copy (and a zero stride), the rows are simply all new columns
+            self._resize(self.numRows, count)
+            return
+        values = array('d')
+        filled = bytearray()
+        emptyValues = array('d', bytes(8 * count))
+        emptyFilled = bytes(count)
+        for start in range(0, self.numRows * numCols, numCols):
+            values.extend(self.values[start:start + colIndex])
+            values.extend(emptyValues)
+            values.extend(self.values[start + colIndex:start + numCols])
+            filled.extend(self.filled[start:start + colIndex])
+            filled.extend(emptyFilled)
+            filled.extend(self.filled[start + colIndex:start + numCols])
+        self.values = values
+        self.filled = filled
+        self.numCols += count
@@ -0,0 +1,220 @@
+from typing import Dict, Optional, Tuple
+
+from spreadsheet.cell import Cell
+from spreadsheet.baseSpreadsheet import BaseSpreadsheet
+from spreadsheet.labelMap import LabelMap, WIDE_LABEL_GAP
+from spreadsheet.valueIndex import ValueIndex
+
+
+# ------------------------------------------------------------------------
+# Dictionary-of-keys spreadsheet implementation.
+#
+# Values are kept in a dict keyed by (row label, column label). Labels are
+# stable ids handed out by a LabelMap per axis, so inserting a row or a
+# column usually only adds a label and leaves the stored cells alone. find()
+# uses a value index that is also keyed by labels.
+#
+# Insert cost: adding the label is a list insert, O(rows) or O(cols) (a
+# memmove). When the labels around the insert point run out of room, all
+# labels on that axis are spaced out again and every cell is re-keyed,
+# O(nnz); with WIDE_LABEL_GAP that happens once every ~128 inserts at the
+# same place, so inserts are amortised O(rows + nnz / 128), not O(log n).
+# ------------------------------------------------------------------------
+
+class DOKSpreadsheet(BaseSpreadsheet):
+
+    def __init__(self):
+        # labels are only dict keys, so they can be spaced out widely
+        self.rowLabels = LabelMap(gap=WIDE_LABEL_GAP)
+        self.colLabels = LabelMap(gap=WIDE_LABEL_GAP)
+        # (row label, col label) -> value
+        self.cells: Dict[Tuple[int, int], float] = {}
+        # value -> (row label, col label)
+        self.valueIndex = ValueIndex(stableKeys=True)
+
+    def buildSpreadsheet(self, lCells: [Cell]):  # type: ignore
+        """
+        Construct the data structure to store nodes.
+        @param lCells: list of cells to be stored
+        """
+        if not lCells:
+            return
+        # create enough rows and columns to fit every cell, then store them
+        maxRow = max(cell.row for cell in lCells)
+        maxCol = max(cell.col for cell in lCells)
+        while len(self.rowLabels) <= maxRow:
+            self.rowLabels.append()
+        while len(self.colLabels) <= maxCol:
+            self.colLabels.append()
+        for cell in lCells:
+            self._store(self.rowLabels.label(cell.row), self.colLabels.label(cell.col), cell.val)
+
+    def appendRow(self) -> bool:
+        """
+        Appends an empty row to the spreadsheet.
+
+        @return True if operation was successful, or False if not.
+        """
+        self.rowLabels.append()
+        return True
+
+    def appendCol(self) -> bool:
+        """
+        Appends an empty column to the spreadsheet.
+
+        @return True if operation was successful, or False if not.
+        """
+        self.colLabels.append()
+        return True
+
+    def insertRow(self, rowIndex: int) -> bool:
+        """
+        Inserts an empty row into the spreadsheet.
+
+        @param rowIndex Index of the existing row that will be after the newly inserted row.  If inserting as first row, specify rowIndex to be 0.  If inserting a row after the last one, specify rowIndex to be rowNum()-1.
+
+        @return True if operation was successful, or False if not, e.g., rowIndex is invalid.
+
+        Cost: O(rows) label insert, plus an O(nnz) re-key about once every 128 inserts at one place.
+        """
+        if rowIndex < 0 or rowIndex > self.rowNum():
+            return False
+        relabelled = self.rowLabels.insert(rowIndex)
+        if relabelled:
+            self._rekey(relabelled, None)
+        return True
+
+    def insertCol(self, colIndex: int) -> bool:
+        """
+        Inserts an empty column into the spreadsheet.
+
+        @param colIndex Index of the existing column that will be after the newly inserted row.  If inserting as first column, specify colIndex to be 0.  If inserting a column after the last one, specify colIndex to be colNum()-1.
+
+        return True if operation was successful, or False if not, e.g., colIndex is invalid.
+
+        Cost: O(cols) label insert, plus an O(nnz) re-key about once every 128 inserts at one place.
+        """
+        if colIndex < 0 or colIndex > self.colNum():
+            return False
+        relabelled = self.colLabels.insert(colIndex)
+        if relabelled:
+            self._rekey(None, relabelled)
+        return True
+
+    def insertRows(self, rowIndex: int, count: int) -> bool:
+        """
+        Inserts count empty rows into the spreadsheet, as if insertRow(rowIndex) was called count times.
+
+        @return True if operation was successful, or False if not, e.g., rowIndex or count is invalid.
+
+        Cost: O(rows + count) label insert, plus at most one O(nnz) re-key.
+        """
+        if count < 1 or rowIndex < 0 or rowIndex > self.rowNum():
+            return False
+        relabelled = self.rowLabels.insertMany(rowIndex, count)
+        if relabelled:
+            self._rekey(relabelled, None)
+        return True
+
+    def insertCols(self, colIndex: int, count: int) -> bool:
+        """
+        Inserts count empty columns into the spreadsheet, as if insertCol(colIndex) was called count times.
+
+        @return True if operation was successful, or False if not, e.g., colIndex or count is invalid.
+
+        Cost: O(cols + count) label insert, plus at most one O(nnz) re-key.
+        """
+        if count < 1 or colIndex < 0 or colIndex > self.colNum():
+            return False
+        relabelled = self.colLabels.insertMany(colIndex, count)
+        if relabelled:
+            self._rekey(None, relabelled)
+        return True
+
+    def update(self, rowIndex: int, colIndex: int, value: float) -> bool:
+        """
+        Update the cell with the input/argument value.
+
+        @param rowIndex Index of row to update.
+        @param colIndex Index of column to update.
+        @param value Value to update.  Can assume they are floats.
+
+        @return True if cell can be updated.  False if cannot, e.g., row or column indices do not exist.
+        """
+        if rowIndex < 0 or rowIndex >= self.rowNum() or colIndex < 0 or colIndex >= self.colNum():
+            return False
+        self._store(self.rowLabels.label(rowIndex), self.colLabels.label(colIndex), value)
+        return True
+
+    def get(self, rowIndex: int, colIndex: int) -> Optional[float]:
+        """
+        Read the value of a single cell.
+
+        @param rowIndex Index of row to read.
+        @param colIndex Index of column to read.
+
+        @return Value of the cell, or None if the cell is empty or the indices do not exist.
+        """
+        if rowIndex < 0 or rowIndex >= self.rowNum() or colIndex < 0 or colIndex >= self.colNum():
+            return None
+        return self.cells.get((self.rowLabels.label(rowIndex), self.colLabels.label(colIndex)))
+
+    def rowNum(self) -> int:
+        """
+        @return Number of rows the spreadsheet has.
+        """
+        return len(self.rowLabels)
+
+    def colNum(self) -> int:
+        """
+        @return Number of column the spreadsheet has.
+        """
+        return len(self.colLabels)
+
+    def nnz(self) -> int:
+        """
+        @return Number of cells that have values.
+        """
+        return len(self.cells)
+
+    def find(self, value: float) -> [(int, int)]:  # type: ignore
+        """
+        Find and return a list of cells that contain the value 'value'.
+
+        @param value value to search for.
+
+        @return List of cells (row, col) that contains the input value.
+            """
+        # labels sort in the same order as positions, so the hits are already in row-major order
+        return [(self.rowLabels.position(rowLabel), self.colLabels.position(colLabel))
+                for rowLabel, colLabel in self.valueIndex.find(value)]
+
+    def entries(self) -> [Cell]:  # type: ignore
+        """
+        @return A list of cells that have values (i.e., all non None cells).
+        """
+        rowPositions = self.rowLabels.positions()
+        colPositions = self.colLabels.positions()
+        return [Cell(rowPositions[rowLabel], colPositions[colLabel], self.cells[(rowLabel, colLabel)])
+                for rowLabel, colLabel in sorted(self.cells)]
+
+    def _store(self, rowLabel: int, colLabel: int, value: float):
+        """
+        Store value in the cell with the given labels, keeping the value index up to date.
+        """
+        self.cells[(rowLabel, colLabel)] = value
+        self.valueIndex.update(rowLabel, colLabel, value)
+
+    def _rekey(self, rowRelabelled: Optional[Dict[int, int]], colRelabelled: Optional[Dict[int, int]]):
+        """
+        Re-key every cell after a LabelMap had to space its labels out again.
+        """
+        cells = self.cells
+        self.cells = {}
+        self.valueIndex = ValueIndex(stableKeys=True)
+        for (rowLabel, colLabel), value in cells.items():
+            if rowRelabelled:
+                rowLabel = rowRelabelled[rowLabel]
+            if colRelabelled:
+                colLabel = colRelabelled[colLabel]
+            self._store(rowLabel, colLabel, value)
@@ -0,0 +1,214 @@
+from typing import Optional
+
+from spreadsheet.cell import Cell
+from spreadsheet.baseSpreadsheet import BaseSpreadsheet
+from spreadsheet.denseSpreadsheet import DenseSpreadsheet
+from spreadsheet.dokSpreadsheet import DOKSpreadsheet
+
+
+# ------------------------------------------------------------------------
+# Density-adaptive spreadsheet implementation.
+#
+# Holds its cells in either a DenseSpreadsheet or a DOKSpreadsheet, and
+# tracks the fill ratio nnz / (rows * cols) as it changes. When the ratio
+# reaches denseAt the cells move to the dense layout, and when it drops
+# below sparseAt they move back to the sparse one. The gap between the
+# two thresholds stops a sheet hovering near one of them from converting
+# back and forth. Both layouts use the same index rules, and find() uses
+# exact matching in both, so the switch can't be seen from outside.
+# ------------------------------------------------------------------------
+
+# default fill ratios at which the layout is switched
+DENSE_AT = 0.5
+SPARSE_AT = 0.25
+
+
+class HybridSpreadsheet(BaseSpreadsheet):
+
+    def __init__(self, denseAt: float = DENSE_AT, sparseAt: float = SPARSE_AT):
+        """
+        @param denseAt: fill ratio at or above which the dense layout is used.
+        @param sparseAt: fill ratio below which the sparse layout is used, should be less than denseAt.
+        """
+        self.denseAt = denseAt
+        self.sparseAt = sparseAt
+        # current layout, an empty sheet is sparse
+        self.sheet = DOKSpreadsheet()
+
+    def buildSpreadsheet(self, lCells: [Cell]):  # type: ignore
+        """
+        Construct the data structure to store nodes.
+        @param lCells: list of cells to be stored
+        """
+        if not lCells:
+            return
+        if self.sheet.nnz() == 0:
+            # pick the layout up front (len(lCells) is an upper bound on the cells filled),
+            # so a sheet that is dense from the start isn't built sparse and then converted
+            numRows = max(self.rowNum(), max(cell.row for cell in lCells) + 1)
+            numCols = max(self.colNum(), max(cell.col for cell in lCells) + 1)
+            if len(lCells) >= self.denseAt * numRows * numCols:
+                self._convert(DenseSpreadsheet())
+        self.sheet.buildSpreadsheet(lCells)
+        self._rebalance()
+
+    def appendRow(self) -> bool:
+        """
+        Appends an empty row to the spreadsheet.
+
+        @return True if operation was successful, or False if not.
+        """
+        success = self.sheet.appendRow()
+        self._rebalance()
+        return success
+
+    def appendCol(self) -> bool:
+        """
+        Appends an empty column to the spreadsheet.
+
+        @return True if operation was successful, or False if not.
+        """
+        success = self.sheet.appendCol()
+        self._rebalance()
+        return success
+
+    def insertRow(self, rowIndex: int) -> bool:
+        """
+        Inserts an empty row into the spreadsheet.
+
+        @param rowIndex Index of the existing row that will be after the newly inserted row.  If inserting as first row, specify rowIndex to be 0.  If inserting a row after the last one, specify rowIndex to be rowNum()-1.
+
+        @return True if operation was successful, or False if not, e.g., rowIndex is invalid.
+        """
+        success = self.sheet.insertRow(rowIndex)
+        if success:
+            self._rebalance()
+        return success
+
+    def insertCol(self, colIndex: int) -> bool:
+        """
+        Inserts an empty column into the spreadsheet.
+
+        @param colIndex Index of the existing column that will be after the newly inserted row.  If inserting as first column, specify colIndex to be 0.  If inserting a column after the last one, specify colIndex to be colNum()-1.
+
+        return True if operation was successful, or False if not, e.g., colIndex is invalid.
+        """
+        success = self.sheet.insertCol(colIndex)
+        if success:
+            self._rebalance()
+        return success
+
+    def insertRows(self, rowIndex: int, count: int) -> bool:
+        """
+        Inserts count empty rows into the spreadsheet, as if insertRow(rowIndex) was called count times.
+
+        @return True if operation was successful, or False if not, e.g., rowIndex or count is invalid.
+        """
+        success = self.sheet.insertRows(rowIndex, count)
+        if success:
+            self._rebalance()
+        return success
+
+    def insertCols(self, colIndex: int, count: int) -> bool:
+        """
+        Inserts count empty columns into the spreadsheet, as if insertCol(colIndex) was called count times.
+
+        @return True if operation was successful, or False if not, e.g., colIndex or count is invalid.
+        """
+        success = self.sheet.insertCols(colIndex, count)
+        if success:
+            self._rebalance()
+        return success
+
+    def update(self, rowIndex: int, colIndex: int, value: float) -> bool:
+        """
+        Update the cell with the input/argument value.
+
+        @param rowIndex Index of row to update.
+        @param colIndex Index of column to update.
+        @param value Value to update.  Can assume they are floats.
+
+        @return True if cell can be updated.  False if cannot, e.g., row or column indices do not exist.
+        """
+        filled = self.sheet.nnz()
+        success = self.sheet.update(rowIndex, colIndex, value)
+        # only a newly filled cell changes the fill ratio
+        if self.sheet.nnz() != filled:
+            self._rebalance()
+        return success
+
+    def get(self, rowIndex: int, colIndex: int) -> Optional[float]:
+        """
+        Read the value of a single cell.
+
+        @param rowIndex Index of row to read.
+        @param colIndex Index of column to read.
+
+        @return Value of the cell, or None if the cell is empty or the indices do not exist.
+        """
+        return self.sheet.get(rowIndex, colIndex)
+
+    def rowNum(self) -> int:
+        """
+        @return Number of rows the spreadsheet has.
+        """
+        return self.sheet.rowNum()
+
+    def colNum(self) -> int:
+        """
+        @return Number of column the spreadsheet has.
+        """
+        return self.sheet.colNum()
+
+    def nnz(self) -> int:
+        """
+        @return Number of cells that have values.
+        """
+        return self.sheet.nnz()
+
+    def find(self, value: float) -> [(int, int)]:  # type: ignore
+        """
+        Find and return a list of cells that contain the value 'value'.
+
+        @param value value to search for.
+
+        @return List of cells (row, col) that contains the input value.
+            """
+        if isinstance(self.sheet, DenseSpreadsheet):
+            return self.sheet.find(value)
+        # the sparse layout matches with isclose, keep only the exact matches the dense layout would return
+        return [(row, col) for row, col in self.sheet.find(value) if self.sheet.get(row, col) == value]
+
+    def entries(self) -> [Cell]:  # type: ignore
+        """
+        @return A list of cells that have values (i.e., all non None cells).
+        """
+        return self.sheet.entries()
+
+    def _rebalance(self):
+        """
+        Switch layout if the fill ratio has crossed the threshold for the other one.
+        """
+        size = self.sheet.rowNum() * self.sheet.colNum()
+        ratio = self.sheet.nnz() / size if size else 0.0
+        if isinstance(self.sheet, DenseSpreadsheet):
+            if ratio < self.sparseAt:
+                self._convert(DOKSpreadsheet())
+        elif ratio >= self.denseAt:
+            self._convert(DenseSpreadsheet())
+
+    def _convert(self, sheet: BaseSpreadsheet):
+        """
+        Move every cell into the empty sheet, keeping the dimensions, and make it the current layout.
+        """
+        numRows = self.sheet.rowNum()
+        numCols = self.sheet.colNum()
+        if isinstance(sheet, DenseSpreadsheet):
+            # allocate the whole grid in one go rather than column by column
+            sheet._resize(numRows, numCols)
+        sheet.buildSpreadsheet(self.sheet.entries())
+        while sheet.rowNum() < numRows:
+            sheet.appendRow()
+        while sheet.colNum() < numCols:
+            sheet.appendCol()
+        self.sheet = sheet
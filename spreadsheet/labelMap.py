@@ -0,0 +1,102 @@
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+# ------------------------------------------------------------------------
+# Maps logical positions (e.g. column indices) to stable integer labels.
+#
+# Labels are kept sorted and spaced 'gap' apart, so a new position can
+# usually be given a label between its neighbours without touching anything
+# that refers to the existing labels. Only when two neighbours run out of
+# room are all labels spaced out again. Each insert at the same place halves
+# the room there, so that happens once every log2(gap) inserts at one place.
+# ------------------------------------------------------------------------
+
+# gap for labels stored in 8 byte typed buffers (labels stay below 2**63 for up to 2**31 positions)
+LABEL_GAP = 2 ** 32
+
+# gap for labels only held as Python ints (lists, dict keys), which are unbounded
+WIDE_LABEL_GAP = 2 ** 128
+
+
+class LabelMap:
+
+    def __init__(self, size: int = 0, gap: int = LABEL_GAP):
+        """
+        @param size: number of positions to start with.
+        @param gap: spacing of the labels; LABEL_GAP if they have to fit 8 byte
+            typed buffers, WIDE_LABEL_GAP if they are only kept as Python ints.
+        """
+        self.gap = gap
+        self.labels: List[int] = [gap * (i + 1) for i in range(size)]
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def label(self, position: int) -> int:
+        """
+        @return Label of the position.
+        """
+        return self.labels[position]
+
+    def position(self, label: int) -> int:
+        """
+        @return Current position of the label, in O(log n).
+        """
+        return bisect_left(self.labels, label)
+
+    def positions(self) -> Dict[int, int]:
+        """
+        @return Dictionary from every label to its current position.
+        """
+        return {label: position for position, label in enumerate(self.labels)}
+
+    def append(self) -> int:
+        """
+        Adds a position at the end.
+
+        @return Label of the new position.
+        """
+        label = self.labels[-1] + self.gap if self.labels else self.gap
+        self.labels.append(label)
+        return label
+
+    def insert(self, position: int) -> Optional[Dict[int, int]]:
+        """
+        Inserts a new position before the existing one at 'position', shifting
+        it and everything after it along by one.
+
+        @param position Position the new label will have, 0 <= position <= len().
+
+        @return None if the existing labels are unchanged, otherwise a dictionary
+            from each old label to its new label (labels had to be spaced out again).
+        """
+        return self.insertMany(position, 1)
+
+    def insertMany(self, position: int, count: int) -> Optional[Dict[int, int]]:
+        """
+        Inserts count new positions before the existing one at 'position', shifting
+        it and everything after it along by count.
+
+        @param position Position the first new label will have, 0 <= position <= len().
+        @param count Number of positions to insert, less than the gap.
+
+        @return None if the existing labels are unchanged, otherwise a dictionary
+            from each old label to its new label (labels had to be spaced out again).
+        """
+        relabelled = None
+        lower = self.labels[position - 1] if position > 0 else 0
+        upper = self.labels[position] if position < len(self.labels) else lower + 2 * self.gap
+        if upper - lower < count + 1:
+            # no room left between the neighbours, space everything out again
+            relabelled = {}
+            for i in range(len(self.labels)):
+                newLabel = self.gap * (i + 1)
+                relabelled[self.labels[i]] = newLabel
+                self.labels[i] = newLabel
+            lower = self.labels[position - 1] if position > 0 else 0
+            upper = self.labels[position] if position < len(self.labels) else lower + 2 * self.gap
+
+        # spread the new labels evenly between the neighbours
+        room = upper - lower
+        self.labels[position:position] = [lower + room * i // (count + 1) for i in range(1, count + 1)]
+        return relabelled
@@ -1,5 +1,6 @@
 from spreadsheet.baseSpreadsheet import BaseSpreadsheet
 from spreadsheet.cell import Cell
+from spreadsheet.valueIndex import ValueIndex
 
 # ------------------------------------------------------------------------
 # This class  is required TO BE IMPLEMENTED
@@ -14,6 +15,7 @@ class Node:
     '''
     Doubly linked list node
     '''
+    __slots__ = ('value', 'next', 'prev')
 
     def __init__(self, value):
         self.value = value
@@ -25,13 +27,17 @@ class DoubleLinkedList:
     '''
     Double linked list class
     '''
+    __slots__ = ('head', 'tail', 'size')
 
     def __init__(self):
         self.head = None
         self.tail = None
+        # number of cells in the list
+        self.size = 0
 
     def insertColCell(self, value):
         newNode = Node(value)
+        self.size += 1
 
         # If the list is empty, set the new node as the head and tail
         if self.head is None:
@@ -67,65 +73,66 @@ class DoubleLinkedList:
         return True
 
 
+    def insertBefore(self, nextNode, value):
+        """
+        Links a new node holding value in front of nextNode, or at the tail if nextNode is None.
+
+        @return The new node.
+        """
+        newNode = Node(value)
+        self.size += 1
+        prevNode = self.tail if nextNode is None else nextNode.prev
+        newNode.prev = prevNode
+        newNode.next = nextNode
+        if prevNode is None:
+            self.head = newNode
+        else:
+            prevNode.next = newNode
+        if nextNode is None:
+            self.tail = newNode
+        else:
+            nextNode.prev = newNode
+        return newNode
+
+
 class LinkedListSpreadsheet(BaseSpreadsheet):
 
-    def __init__(self):
-        # initialize head node with empty cell
-        self.head = Node(DoubleLinkedList())
-        # tail node points to head node initially (they're the same)
-        self.tail = self.head
+    def __init__(self, indexed: bool = False):
+        """
+        @param indexed: if True, keep a value index so find() doesn't scan every cell.
+        """
+        # no rows yet, head and tail are set by the first appendRow
+        self.head = None
+        self.tail = None
+        # row directory: rows[i] is the node of row i, so a row can be found without walking from head
+        self.rows = []
+        # dimensions and number of filled cells, kept up to date by every operation
+        self.numCols = 0
+        self.numFilled = 0
+        self.valueIndex = ValueIndex() if indexed else None
 
     def buildSpreadsheet(self, lCells: [Cell]):  # type: ignore
         """
         Construct the data structure to store nodes.
         @param lCells: list of cells to be stored
         """
-        # CREATE ALL ROWS
-        # Create the first node in the list
-        if len(lCells) > 0:
-            self.head = Node(DoubleLinkedList())
-            self.tail = self.head
-            self.head.value.head = Node(lCells[0])
-            self.head.value.tail = self.head.value.head
-            lCells.pop(0)
-
-            currRow = 0
-
-            # Create the rest of the rows
-            for cell in lCells:
-                # if row is greater than the current greatest row, append a new row
-                if cell.row > self.tail.value.head.value.row:
-                    self.appendRow()
-
-                currNode = self.head
-                currRow = self.head.value.head.value.row
-                # Traverse to correct row
-                while currNode is not None and currRow < cell.row:
-                    currRow = currNode.value.head.value.row
-                    currNode = currNode.next
-                while currNode is not None and currRow > cell.row:
-                    currRow = currNode.value.head.value.row
-                    currNode = currNode.prev
-                # if matching row found, insert a cell
-                if currNode is not None and currRow == cell.row:
-                    # shift to correct row linked list that contains columns
-                    colList = currNode.value
-                    # insert column
-                    colList.insertColCell(cell)
-                # otherwise create and insert a row
-                else:
-                    self.createRow(cell.row)
+        for cell in lCells:
+            # create enough rows and columns to fit the cell
+            while cell.row >= self.rowNum():
+                self.appendRow()
+            if cell.col >= self.numCols:
+                self.numCols = cell.col + 1
+            self.update(cell.row, cell.col, cell.val)
+
+        if self.valueIndex is not None:
+            self.valueIndex.build(self.entries())
 
     def appendRow(self):
         """
         Appends an empty row to the spreadsheet.
         """
-        # create new row and initialize it with empty cell that contains row number
+        # rows only hold cells with values, so a new row is an empty list
         newRow = Node(DoubleLinkedList())
-        emptyNodeCell = Node(
-            Cell(self.rowNum(), self.colNum() - 1, None))
-        newRow.value.head = emptyNodeCell
-        newRow.value.tail = emptyNodeCell
 
         if self.head is None:
             self.head = newRow
@@ -133,6 +140,7 @@ class LinkedListSpreadsheet(BaseSpreadsheet):
             self.tail.next = newRow
             newRow.prev = self.tail
         self.tail = newRow
+        self.rows.append(newRow)
         return True
 
     def appendCol(self):
@@ -142,19 +150,8 @@ class LinkedListSpreadsheet(BaseSpreadsheet):
         @return True if operation was successful, or False if not.
         """
 
-        # Move through row LL, appending newCol to each row
-        currNode = self.head
-        endCol = self.colNum()
-        while currNode is not None:
-            # Create node that will act as empty column
-            newNode = Node(
-                Cell(currNode.value.head.value.row, endCol, None))
-            if currNode is None:
-                return False
-            currNode.value.tail.next = newNode
-            newNode.prev = currNode.value.tail
-            currNode.value.tail = newNode
-            currNode = currNode.next
+        # the column count lives in the sheet, so no row needs to change
+        self.numCols += 1
         return True
 
     def insertRow(self, rowIndex: int) -> bool:
@@ -165,44 +162,22 @@ class LinkedListSpreadsheet(BaseSpreadsheet):
 
         @return True if operation was successful, or False if not, e.g., rowIndex is invalid.
         """
-        if rowIndex < -1 or rowIndex >= self.tail.value.head.value.row:
+        if rowIndex < -1 or rowIndex >= self.rowNum():
             return False
 
         if rowIndex == -1:
             self.appendRow()
             return True
 
-        # create new row and initialize it with empty cell that contains row number
-        newRow = Node(DoubleLinkedList())
-        emptyNodeCell = Node(
-            Cell(rowIndex, self.colNum() - 1, None))
-        newRow.value.head = emptyNodeCell
-        newRow.value.tail = emptyNodeCell
-        # start at head
-        currNode = self.head
-        # if inserting as first row, set head to newRow
-        if rowIndex < currNode.value.head.value.row:
-            newRow.next = currNode
-            currNode.prev = newRow
-            self.head = newRow
-        else:
-            # traverse to row before insertion point
-            while currNode.next is not None and rowIndex > currNode.next.value.head.value.row:
-                if currNode is None:
-                    return False
-                currNode = currNode.next
-            # loop will have overshot so insertNode.next will be current rowNode
-            newRow.next = currNode.next
-            currNode.next = newRow
-            newRow.prev = currNode
+        self.createRow(rowIndex)
         # update row values of all nodes after insertion point
-        currNode = newRow.next
-        while currNode is not None:
-            colNode = currNode.value.head
+        for rowNode in self.rows[rowIndex + 1:]:
+            colNode = rowNode.value.head
             while colNode is not None:
                 colNode.value.row += 1
                 colNode = colNode.next
-            currNode = currNode.next
+        if self.valueIndex is not None:
+            self.valueIndex.shiftRows(rowIndex)
         return True
 
     def insertCol(self, colIndex: int) -> bool:
@@ -211,7 +186,7 @@ class LinkedListSpreadsheet(BaseSpreadsheet):
 
         @param colIndex Index of the existing column that will be before the newly inserted row.  If inserting as first column, specify colIndex to be -1.
         """
-        if colIndex < -1 or colIndex >= self.tail.value.head.value.col:
+        if colIndex < -1 or colIndex >= self.colNum():
             return False
 
         if colIndex == -1:
@@ -219,27 +194,67 @@ class LinkedListSpreadsheet(BaseSpreadsheet):
             return True
 
         # traverse row list
-        rowNode = self.head
-        while rowNode is not None:
+        for rowNode in self.rows:
+            colList = rowNode.value
+            # walk back from the tail, moving the columns after colIndex along by one
+            colNode = colList.tail
+            while colNode is not None and colNode.value.col > colIndex:
+                colNode.value.col += 1
+                colNode = colNode.prev
+        self.numCols += 1
+
+        if self.valueIndex is not None:
+            self.valueIndex.shiftCols(colIndex + 1)
+        return True
+
+    def insertRows(self, rowIndex: int, count: int) -> bool:
+        """
+        Inserts count empty rows into the spreadsheet, as if insertRow(rowIndex) was called count times.
+
+        @return True if operation was successful, or False if not, e.g., rowIndex or count is invalid.
+        """
+        if count < 1 or rowIndex < -1 or rowIndex >= self.rowNum():
+            return False
+
+        if rowIndex == -1:
+            for _ in range(count):
+                self.appendRow()
+            return True
+
+        self.createRow(rowIndex, count)
+        # one renumbering sweep over the rows after the block
+        for rowNode in self.rows[rowIndex + count:]:
             colNode = rowNode.value.head
-            # create column with current new max col and row of current row
-            newCol = Node(Cell(rowNode.value.tail.value.row,
-                          colIndex + 1, None))
-            # add column in correct position
-            insertedCol = False
             while colNode is not None:
-                if colIndex < colNode.value.col and insertedCol is False:
-                    # insert column
-                    newCol.prev = colNode
-                    newCol.next = colNode.next
-                    colNode.next = newCol
-                    insertedCol = True
-                if insertedCol:
-                    colNode.value.col += 1
+                colNode.value.row += count
                 colNode = colNode.next
-            # move to next row
-            rowNode = rowNode.next
+        if self.valueIndex is not None:
+            self.valueIndex.shiftRows(rowIndex, count)
+        return True
+
+    def insertCols(self, colIndex: int, count: int) -> bool:
+        """
+        Inserts count empty columns into the spreadsheet, as if insertCol(colIndex) was called count times.
+
+        @return True if operation was successful, or False if not, e.g., colIndex or count is invalid.
+        """
+        if count < 1 or colIndex < -1 or colIndex >= self.colNum():
+            return False
+
+        if colIndex == -1:
+            self.numCols += count
+            return True
 
+        # one walk back along each row, moving the columns after colIndex along by count
+        for rowNode in self.rows:
+            colNode = rowNode.value.tail
+            while colNode is not None and colNode.value.col > colIndex:
+                colNode.value.col += count
+                colNode = colNode.prev
+        self.numCols += count
+
+        if self.valueIndex is not None:
+            self.valueIndex.shiftCols(colIndex + 1, count)
         return True
 
     def update(self, rowIndex: int, colIndex: int, value: float) -> bool:
@@ -252,51 +267,77 @@ class LinkedListSpreadsheet(BaseSpreadsheet):
 
         @return True if cell can be updated.  False if cannot, e.g., row or column indices do not exist.
         """
-        # traverse row list
-        rowNode = self.head
-        rowCreated = False
-        while rowNode is not None:
-            currRow = rowNode.value.head.value.row
-            if currRow == rowIndex:
-                # traverse column list
-                colList = rowNode.value
-                colNode = colList.head
-                while colNode is not None and colNode.value.col <= colIndex:
-                    if colNode.value.col == colIndex:
-                        colNode.value.val = value
-                        return True
-                    colNode = colNode.next
-                # if you're still inside the spreadsheet, create and add new column
-                return colList.insertColCell(Cell(rowIndex, colIndex, value))
+        if rowIndex < 0 or rowIndex >= self.rowNum() or colIndex < 0 or colIndex >= self.colNum():
+            return False
 
-            # if row hasn't been created yet, but you're still inside spreadsheet, create row
-            if rowCreated is False and rowNode.next is not None and rowNode.next.value.head.value.row > rowIndex:
-                self.createRow(rowIndex)
-                rowCreated = True
+        # look the row up in the directory
+        colList = self.rows[rowIndex].value
+        if self.valueIndex is not None:
+            self.valueIndex.update(rowIndex, colIndex, value)
+        # traverse column list, unless the new cell goes after the last one
+        if colList.tail is not None and colIndex <= colList.tail.value.col:
+            colNode = colList.head
+            while colNode is not None and colNode.value.col <= colIndex:
+                if colNode.value.col == colIndex:
+                    colNode.value.val = value
+                    return True
+                colNode = colNode.next
+        # if you're still inside the spreadsheet, create and add new column
+        self.numFilled += 1
+        return colList.insertColCell(Cell(rowIndex, colIndex, value))
 
-            rowNode = rowNode.next
-        return False
+    def updateMany(self, lCells: [Cell]) -> [bool]:  # type: ignore
+        """
+        Update many cells, as if update() was called for each in turn.
+
+        @param lCells: list of cells, each holding the row, column and value to update.
+
+        @return List with the result update() would have returned for each cell.
+        """
+        numRows = self.rowNum()
+        results = []
+        # row -> {col: value} of the cells to write (last write wins)
+        pending = {}
+        for cell in lCells:
+            if cell.row < 0 or cell.row >= numRows or cell.col < 0 or cell.col >= self.numCols:
+                results.append(False)
+                continue
+            pending.setdefault(cell.row, {})[cell.col] = cell.val
+            if self.valueIndex is not None:
+                self.valueIndex.update(cell.row, cell.col, cell.val)
+            results.append(True)
+
+        # one sweep along each row, in column order
+        for rowIndex, rowCells in pending.items():
+            colList = self.rows[rowIndex].value
+            colNode = colList.head
+            for colIndex in sorted(rowCells):
+                while colNode is not None and colNode.value.col < colIndex:
+                    colNode = colNode.next
+                if colNode is not None and colNode.value.col == colIndex:
+                    colNode.value.val = rowCells[colIndex]
+                else:
+                    colList.insertBefore(colNode, Cell(rowIndex, colIndex, rowCells[colIndex]))
+                    self.numFilled += 1
+        return results
 
     def rowNum(self) -> int:
         """
         @return Number of rows the spreadsheet has.
         """
-        # Add one to tail row because it is 0 indexed
-        return self.tail.value.head.value.row + 1
+        return len(self.rows)
 
     def colNum(self) -> int:
         """
         @return Number of column the spreadsheet has.
         """
-        maxCol = 0
-        # traverse row list and check each row's tail col
-        currNode = self.head
-        while currNode is not None:
-            if currNode.value.tail.value.col > maxCol:
-                maxCol = currNode.value.tail.value.col
-            currNode = currNode.next
-        # Add one to maxCol because it is 0 indexed
-        return maxCol + 1
+        return self.numCols
+
+    def nnz(self) -> int:
+        """
+        @return Number of cells that have values.
+        """
+        return self.numFilled
 
     def find(self, value: float) -> [(int, int)]:  # type: ignore
         """
@@ -306,6 +347,8 @@ class LinkedListSpreadsheet(BaseSpreadsheet):
 
         @return List of cells (row, col) that contains the input value.
             """
+        if self.valueIndex is not None:
+            return self.valueIndex.find(value)
         foundCells = []
         # traverse every cell and check if value matches
         rowNode = self.head
@@ -323,49 +366,42 @@ class LinkedListSpreadsheet(BaseSpreadsheet):
         @return A list of cells that have values (i.e., all non None cells).
         """
         cells = []
-        # traverse every cell and check if value matches
+        # rows only hold cells with values, so every node is an entry
         rowNode = self.head
         while rowNode is not None:
             colNode = rowNode.value.head
             while colNode is not None:
-                if colNode.value.val is not None:
-                    cells.append(colNode.value)
+                cells.append(colNode.value)
                 colNode = colNode.next
             rowNode = rowNode.next
         return cells
 
-    def createRow(self, rowIndex: int) -> bool:
+    def createRow(self, rowIndex: int, count: int = 1) -> bool:
         """
-        Inserts an empty row into the spreadsheet.
+        Links count new empty rows into the row list and row directory, without renumbering the rows after them.
 
-        @param rowIndex Index of the existing row that will be after the newly inserted row.  If inserting as first row, specify rowIndex to be 0.  If inserting a row after the last one, specify rowIndex to be rowNum()-1.
+        @param rowIndex Index of the existing row that will be after the newly created rows.
+        @param count Number of rows to create.
 
         @return True if operation was successful, or False if not, e.g., rowIndex is invalid.
         """
-        if rowIndex < -1 or rowIndex >= self.tail.value.head.value.row:
+        if rowIndex < 0 or rowIndex >= self.rowNum():
             return False
 
-        # create new row and initialize it with empty cell that contains row number
-        newRow = Node(DoubleLinkedList())
-        emptyNodeCell = Node(
-            Cell(rowIndex, self.colNum() - 1, None))
-        newRow.value.head = emptyNodeCell
-        newRow.value.tail = emptyNodeCell
-        # start at head
-        currNode = self.head
-        # if inserting as first row, set head to newRow
-        if rowIndex < currNode.value.head.value.row:
-            newRow.next = currNode
-            currNode.prev = newRow
-            self.head = newRow
+        # chain the new rows together, then link the chain in before the row currently at rowIndex
+        newRows = [Node(DoubleLinkedList()) for _ in range(count)]
+        for prevRow, newRow in zip(newRows, newRows[1:]):
+            prevRow.next = newRow
+            newRow.prev = prevRow
+        nextRow = self.rows[rowIndex]
+        first = newRows[0]
+        last = newRows[-1]
+        first.prev = nextRow.prev
+        last.next = nextRow
+        if nextRow.prev is None:
+            self.head = first
         else:
-            # traverse to row before insertion point
-            while currNode.next is not None and rowIndex > currNode.next.value.head.value.row:
-                if currNode is None:
-                    return False
-                currNode = currNode.next
-            # loop will have overshot so insertNode.next will be current rowNode
-            newRow.next = currNode.next
-            currNode.next = newRow
-            newRow.prev = currNode
+            nextRow.prev.next = first
+        nextRow.prev = last
+        self.rows[rowIndex:rowIndex] = newRows
         return True
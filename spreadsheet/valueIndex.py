@@ -0,0 +1,146 @@
+from bisect import bisect_left, bisect_right, insort
+from math import isclose, isfinite
+from typing import Dict, List, Optional, Set, Tuple
+
+from spreadsheet.cell import Cell
+from spreadsheet.labelMap import LabelMap, WIDE_LABEL_GAP
+
+# ------------------------------------------------------------------------
+# Optional value -> cells index that a spreadsheet can keep next to its
+# own storage, so find() doesn't have to scan every cell.
+#
+# Values are matched with math.isclose (default tolerances), the same
+# comparison the CSR spreadsheet uses.
+#
+# Cells are keyed by stable row and column labels (from a LabelMap per
+# axis) rather than by position, so inserting a row or column only adds
+# labels and doesn't re-key the indexed cells: shiftRows()/shiftCols()
+# cost an O(rows)/O(cols) list insert (a memmove), plus an O(indexed
+# cells) re-key once every ~128 inserts at the same place, when the
+# labels there run out of room. find() turns labels back into positions
+# in O(log n) per hit.
+# ------------------------------------------------------------------------
+
+# relative tolerance of math.isclose
+REL_TOL = 1e-09
+
+
+class ValueIndex:
+
+    def __init__(self, stableKeys: bool = False):
+        """
+        @param stableKeys: if True, the rows and columns passed in are already stable keys
+            (e.g. DOKSpreadsheet's labels) and are indexed as they are, and shiftRows()/shiftCols()
+            are not used.
+        """
+        self.values: List[float] = []                           # distinct stored values, sorted
+        self.cells: Dict[float, Set[Tuple[int, int]]] = {}      # value -> (row label, col label) of the cells holding it
+        self.at: Dict[Tuple[int, int], float] = {}              # (row label, col label) -> value stored there
+        # position -> label of each row and column seen so far, None if the keys are already stable
+        self.rowLabels: Optional[LabelMap] = None if stableKeys else LabelMap(gap=WIDE_LABEL_GAP)
+        self.colLabels: Optional[LabelMap] = None if stableKeys else LabelMap(gap=WIDE_LABEL_GAP)
+
+    def build(self, lCells: List[Cell]):
+        """
+        Index the given cells, replacing anything indexed before.
+        @param lCells: list of cells to be indexed
+        """
+        self.values = []
+        self.cells = {}
+        self.at = {}
+        if self.rowLabels is not None:
+            self.rowLabels = LabelMap(gap=WIDE_LABEL_GAP)
+            self.colLabels = LabelMap(gap=WIDE_LABEL_GAP)
+        for cell in lCells:
+            self.update(cell.row, cell.col, cell.val)
+
+    def update(self, rowIndex: int, colIndex: int, value: float):
+        """
+        Record that the cell (rowIndex, colIndex) now holds value.
+        """
+        key = self._key(rowIndex, colIndex)
+        if key in self.at:
+            self._remove(key)
+        self.at[key] = value
+        if value in self.cells:
+            self.cells[value].add(key)
+        else:
+            self.cells[value] = {key}
+            insort(self.values, value)
+
+    def shiftRows(self, rowIndex: int, count: int = 1):
+        """
+        Move every cell in row rowIndex or below down by count rows.
+        """
+        # rows past the last labelled one hold no indexed cells, so there is nothing to move
+        if rowIndex < len(self.rowLabels):
+            relabelled = self.rowLabels.insertMany(rowIndex, count)
+            if relabelled:
+                self._rekey(lambda row, col: (relabelled[row], col))
+
+    def shiftCols(self, colIndex: int, count: int = 1):
+        """
+        Move every cell in column colIndex or to its right along by count columns.
+        """
+        if colIndex < len(self.colLabels):
+            relabelled = self.colLabels.insertMany(colIndex, count)
+            if relabelled:
+                self._rekey(lambda row, col: (row, relabelled[col]))
+
+    def find(self, value: float) -> List[Tuple[int, int]]:
+        """
+        Find the cells holding a value close to 'value', in O(log n + hits log n).
+
+        @param value value to search for.
+
+        @return List of cells (row, col), in row-major order.
+        """
+        if not isfinite(value):
+            found = list(self.cells.get(value, ()))
+        else:
+            # everything isclose to value lies within this band
+            tolerance = abs(value) * REL_TOL / (1 - REL_TOL)
+            low = bisect_left(self.values, value - tolerance)
+            high = bisect_right(self.values, value + tolerance)
+            found = []
+            for candidate in self.values[low:high]:
+                if isclose(candidate, value):
+                    found.extend(self.cells[candidate])
+        # labels sort in the same order as positions
+        found.sort()
+        if self.rowLabels is None:
+            return found
+        rowPosition = self.rowLabels.position
+        colPosition = self.colLabels.position
+        return [(rowPosition(row), colPosition(col)) for row, col in found]
+
+    def _key(self, rowIndex: int, colIndex: int) -> Tuple[int, int]:
+        """
+        @return (row label, col label) the cell is indexed under, labelling any rows and columns not seen yet.
+        """
+        if self.rowLabels is None:
+            return (rowIndex, colIndex)
+        while len(self.rowLabels) <= rowIndex:
+            self.rowLabels.append()
+        while len(self.colLabels) <= colIndex:
+            self.colLabels.append()
+        return (self.rowLabels.label(rowIndex), self.colLabels.label(colIndex))
+
+    def _remove(self, key: Tuple[int, int]):
+        """
+        Forget the value stored at key.
+        """
+        value = self.at.pop(key)
+        keys = self.cells[value]
+        keys.discard(key)
+        if not keys:
+            del self.cells[value]
+            del self.values[bisect_left(self.values, value)]
+
+    def _rekey(self, move):
+        """
+        Re-key every indexed cell with move(row label, col label) -> (row label, col label),
+        after a LabelMap had to space its labels out again.
+        """
+        self.at = {move(row, col): value for (row, col), value in self.at.items()}
+        self.cells = {value: {move(row, col) for (row, col) in keys} for value, keys in self.cells.items()}
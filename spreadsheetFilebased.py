@@ -1,9 +1,18 @@
+import os
 import sys
-from spreadsheet.cell import Cell
 from spreadsheet.baseSpreadsheet import BaseSpreadsheet
 from spreadsheet.arraySpreadsheet import ArraySpreadsheet
 from spreadsheet.linkedlistSpreadsheet import LinkedListSpreadsheet
 from spreadsheet.csrSpreadsheet import CSRSpreadsheet
+from spreadsheet.bufferedCsrSpreadsheet import BufferedCSRSpreadsheet
+from spreadsheet.cscSpreadsheet import CSCSpreadsheet
+from spreadsheet.denseSpreadsheet import DenseSpreadsheet
+from spreadsheet.dokSpreadsheet import DOKSpreadsheet
+from spreadsheet.hybridSpreadsheet import HybridSpreadsheet
+from spreadsheet.costModel import chooseApproach
+from spreadsheet.csrFile import is_csr_file, load_csr
+from spreadsheet.dataLoader import loadSpreadsheet
+from spreadsheet.commandEngine import CommandEngine, parseCommands
 
 
 # -------------------------------------------------------------------
@@ -25,8 +34,9 @@ def usage():
     # On Teaching servers, use 'python3'
     # On Windows, you may need to use 'python' instead of 'python3' to get this to work
     print('python3 spreadsheetFilebased.py',
-          '<approach> <data fileName> <command fileName> <output fileName>')
-    print('<approach> = <array | linkedlist | csr>')
+          '<approach> <data fileName> <command fileName> <output fileName> [<parse workers>]')
+    print('<approach> = <array | linkedlist | csr | bufferedcsr | csc | dense | dok | hybrid | auto>')
+    print('<parse workers> = number of processes that parse the data file, at least 1 (default 1), or auto for one per CPU')
     sys.exit(1)
 
 
@@ -34,18 +44,55 @@ if __name__ == '__main__':
     # Fetch the command line arguments
     args = sys.argv
 
-    if len(args) != 5:
+    if len(args) not in (5, 6):
         print('Incorrect number of arguments.')
         usage()
+    parseWorkers = 1
+    if len(args) == 6:
+        if args[5] == 'auto':
+            # loadSpreadsheet takes None as one worker per CPU
+            parseWorkers = None
+        elif args[5].isdigit() and int(args[5]) >= 1:
+            parseWorkers = int(args[5])
+        else:
+            print('Incorrect number of parse workers.')
+            usage()
+
+    approach = args[1]
+    if approach == 'auto':
+        # pick the approach the benchmark results predict to be fastest for these files
+        try:
+            choice = chooseApproach(args[2], args[3], os.path.dirname(os.path.abspath(__file__)))
+        except FileNotFoundError as e:
+            print(f"Cannot find file {e.filename}!")
+            usage()
+        if choice is None:
+            approach = 'csr'
+            print('auto: no benchmark results found, using csr')
+        else:
+            (approach, cost, costs) = choice
+            print(f'auto: chose {approach}, predicted cost {cost:.6f}s')
+            for candidate in sorted(costs, key=costs.get):
+                print(f'\t{candidate:12}\t{costs[candidate]:.6f}s')
 
     # initialise spreadsheet object
     spreadsheet: BaseSpreadsheet = None
-    if args[1] == 'array':
+    if approach == 'array':
         spreadsheet = ArraySpreadsheet()
-    elif args[1] == 'linkedlist':
+    elif approach == 'linkedlist':
         spreadsheet = LinkedListSpreadsheet()
-    elif args[1] == 'csr':
+    elif approach == 'csr':
         spreadsheet = CSRSpreadsheet()
+    elif approach == 'bufferedcsr':
+        spreadsheet = BufferedCSRSpreadsheet()
+    elif approach == 'csc':
+        spreadsheet = CSCSpreadsheet()
+    elif approach == 'dense':
+        spreadsheet = DenseSpreadsheet()
+    elif approach == 'dok':
+        spreadsheet = DOKSpreadsheet()
+    elif approach == 'hybrid':
+        spreadsheet = HybridSpreadsheet()
     else:
         print('Incorrect argument value.')
         usage()
@@ -54,18 +101,19 @@ if __name__ == '__main__':
     dataFilename = args[2]
     cellsFromFiles = []
     try:
-        dataFile = open(dataFilename, 'r')
-        for line in dataFile:
-            values = line.split()
-            currRow = int(values[0])
-            currCol = int(values[1])
-            currVal = float(values[2])
-            currCell = Cell(currRow, currCol, currVal)
-            # each line contains a cell
-            cellsFromFiles.append(currCell)
-        dataFile.close()
-        # construct the spreadsheet from the read in data
-        spreadsheet.buildSpreadsheet(cellsFromFiles)
+        if is_csr_file(dataFilename):
+            # binary CSR file, map it rather than parse it
+            csr = load_csr(dataFilename)
+            if approach == 'csr':
+                spreadsheet = csr
+            else:
+                cellsFromFiles = csr.entries()
+        else:
+            # stream the file into the spreadsheet a block at a time
+            loadSpreadsheet(spreadsheet, dataFilename, workers=parseWorkers)
+        if cellsFromFiles:
+            # construct the spreadsheet from the read in data
+            spreadsheet.buildSpreadsheet(cellsFromFiles)
     except FileNotFoundError as e:
         print("Data file doesn't exist.")
         usage()
@@ -80,84 +128,9 @@ if __name__ == '__main__':
         commandFile = open(commandFilename, 'r')
         outputFile = open(outputFilename, 'w')
 
-        # for each command
-        for line in commandFile:
-            commandValues = line.split()
-            command = commandValues[0]
-            command = command.upper()
-            # append row
-            if command == 'AR':
-                result = spreadsheet.appendRow()
-                if result:
-                    outputFile.write("Call to appendRow() returned success.\n")
-                else:
-                    outputFile.write("Call to appendRow() returned failure.\n")
-            # append column
-            elif command == 'AC':
-                result = spreadsheet.appendCol()
-                if result:
-                    outputFile.write("Call to appendCol() returned success.\n")
-                else:
-                    outputFile.write("Call to appendCol() returned failure.\n")
-            # insert row
-            elif command == 'IR':
-                rowIndex = int(commandValues[1])
-                result = spreadsheet.insertRow(rowIndex)
-                if result:
-                    outputFile.write(
-                        "Call to insertRow(" + str(rowIndex) + ") returned success.\n")
-                else:
-                    outputFile.write(
-                        "Call to insertRow(" + str(rowIndex) + ") returned failure.\n")
-            # insert column
-            elif command == 'IC':
-                colIndex = int(commandValues[1])
-                result = spreadsheet.insertCol(colIndex)
-                if result:
-                    outputFile.write(
-                        "Call to insertCol(" + str(colIndex) + ") returned success.\n")
-                else:
-                    outputFile.write(
-                        "Call to insertCol(" + str(colIndex) + ") returned failure.\n")
-            # update value
-            elif command == 'U':
-                rowIndex = int(commandValues[1])
-                colIndex = int(commandValues[2])
-                value = float(commandValues[3])
-                result = spreadsheet.update(rowIndex, colIndex, value)
-                if result:
-                    outputFile.write("Call to update(" + str(rowIndex) + "," +
-                                     str(colIndex) + "," + str(value) + ") returned success.\n")
-                else:
-                    outputFile.write("Call to update(" + str(rowIndex) + "," +
-                                     str(colIndex) + "," + str(value) + ") returned failure.\n")
-            # number of rows
-            elif command == 'R':
-                result = spreadsheet.rowNum()
-                outputFile.write("Number of rows = " + str(result) + "\n")
-            # number of columns
-            elif command == 'C':
-                result = spreadsheet.colNum()
-                outputFile.write("Number of columns = " + str(result) + "\n")
-            # find value
-            elif command == 'F':
-                value = float(commandValues[1])
-                lCells = spreadsheet.find(value)
-                outputFile.write(
-                    "Printing output of find(" + str(value) + "): ")
-                outputFile.write(" | ".join(
-                    ["".join(["(", str(cell[0]), ",", str(cell[1]), ")"]) for cell in lCells]))
-                outputFile.write("\n")
-            # enumerate all entries that has a value in spreadsheet
-            elif command == 'E':
-                lCells = spreadsheet.entries()
-                outputFile.write("Printing output of entries(): ")
-                outputFile.write(" | ".join(
-                    [cell.__str__() for cell in lCells]))
-                outputFile.write("\n")
-            else:
-                print('Unknown command.')
-                print(line)
+        # parse the command file as it is run
+        engine = CommandEngine(spreadsheet, outputFile)
+        engine.run(parseCommands(commandFile))
 
         outputFile.close()
         commandFile.close()
@@ -1,12 +1,15 @@
 import os
+import sys
 import random
 import time
 import timeit
 import csv
 from spreadsheet.cell import Cell
 from spreadsheet.arraySpreadsheet import ArraySpreadsheet
-from spreadsheet.linkedlistSpreadsheet import LinkedListSpreadsheet
+from spreadsheet.linkedlistSpreadsheet import LinkedListSpreadsheet, Node, DoubleLinkedList
 from spreadsheet.csrSpreadsheet import CSRSpreadsheet
+from spreadsheet.cscSpreadsheet import CSCSpreadsheet
+from spreadsheet.dataLoader import loadSpreadsheet
 from generation import dataGenerator
 
 data_dir = 'data_files'
@@ -40,58 +43,55 @@ if __name__ == '__main__':
             success = False
         return success
 
-    def create_cells_from_file(filename):
-        cells = []
-        values_only = []
-        try:
-            file = open(filename, 'r')
-            for line in file:
-                values = line.split()
-                currRow = int(values[0])
-                currCol = int(values[1])
-                currVal = float(values[2])
-                currCell = Cell(currRow, currCol, currVal)
-                # each line contains a cell
-                cells.append(currCell)
-                values_only.append(float(values[2]))
-            file.close()
-            return (cells, values_only)
-        except FileNotFoundError as e:
-                print(f"Cannot find file {filename}!")
-
-
     def create_spreadsheets():
         print('Building spreadsheets...')
         for filename in data_files:
             print(f'\t- {filename}')
-            (cells, values) = create_cells_from_file(data_dir + '/' + filename)
+            path = data_dir + '/' + filename
             print('\t\tarray...')
             array = ArraySpreadsheet()
-            array.buildSpreadsheet(cells)
+            loadSpreadsheet(array, path)
             print('\t\tcsr...')
             csr = CSRSpreadsheet()
-            csr.buildSpreadsheet(cells)
+            loadSpreadsheet(csr, path)
+            print('\t\tcsc (converted from csr)...')
+            csc = CSCSpreadsheet.from_csr(csr)
             print('\t\tlinked list...')
-            # building linked list last, because it pops first item from cells!
             linked_list = LinkedListSpreadsheet()
-            linked_list.buildSpreadsheet(cells)
+            loadSpreadsheet(linked_list, path)
 
 
             test_case = {
                 'filename':       filename,
-                'values':         values,
+                'values':         csr.vala,
                 'array':          array,
                 'linked_list':    linked_list,
-                'csr':            csr
+                'csr':            csr,
+                'csc':            csc
             }
             test_cases.append(test_case)
 
+    def fresh_spreadsheet(filename, implementation):
+        # a new copy of a test case's spreadsheet, so a timed run doesn't see the changes an earlier run made
+        path = data_dir + '/' + filename
+        if implementation == 'array':
+            spreadsheet = ArraySpreadsheet()
+        elif implementation == 'linked_list':
+            spreadsheet = LinkedListSpreadsheet()
+        else:
+            spreadsheet = CSRSpreadsheet()
+        loadSpreadsheet(spreadsheet, path)
+        if implementation == 'csc':
+            spreadsheet = CSCSpreadsheet.from_csr(spreadsheet)
+        return spreadsheet
+
     def test_find(iterations):
         for test_case in test_cases:
             
             array = test_case['array']
             linked_list = test_case['linked_list']
             csr = test_case['csr']
+            csc = test_case['csc']
 
             (rows, cols, fill_percent, min_val, max_val) = test_case['filename'].split('_')
             findable_value = random.choice(test_case['values'])
@@ -112,6 +112,7 @@ if __name__ == '__main__':
                 results.append([test[0], test[1], 'array', timeit.timeit(lambda: find_test_helper(array, test[2]()), number=iterations)])
                 results.append([test[0], test[1], 'linked_list', timeit.timeit(lambda: find_test_helper(linked_list, test[2]()), number=iterations)])
                 results.append([test[0], test[1], 'csr', timeit.timeit(lambda: find_test_helper(csr, test[2]()), number=iterations)])
+                results.append([test[0], test[1], 'csc', timeit.timeit(lambda: find_test_helper(csc, test[2]()), number=iterations)])
 
 
     def test_insert(iterations):
@@ -121,6 +122,7 @@ if __name__ == '__main__':
             array = test_case['array']
             linked_list = test_case['linked_list']
             csr = test_case['csr']
+            csc = test_case['csc']
 
             last_row = int(rows) - 1
             last_col = int(cols) - 1
@@ -154,12 +156,14 @@ if __name__ == '__main__':
                 results.append([test[0], test[1], 'array', timeit.timeit(lambda: insert_row_test_helper(array, test[2]()), number=iterations)])
                 results.append([test[0], test[1], 'linked_list', timeit.timeit(lambda: insert_row_test_helper(linked_list, test[2]()), number=iterations)])
                 results.append([test[0], test[1], 'csr', timeit.timeit(lambda: insert_row_test_helper(csr, test[2]()), number=iterations)])
+                results.append([test[0], test[1], 'csc', timeit.timeit(lambda: insert_row_test_helper(csc, test[2]()), number=iterations)])
 
             for test in col_tests:
                 print('executing: ', test[0], '\t', test[1])
                 results.append([test[0], test[1], 'array', timeit.timeit(lambda: insert_col_test_helper(array, test[2]()), number=iterations)])
                 results.append([test[0], test[1], 'linked_list', timeit.timeit(lambda: insert_col_test_helper(linked_list, test[2]()), number=iterations)])
                 results.append([test[0], test[1], 'csr', timeit.timeit(lambda: insert_col_test_helper(csr, test[2]()), number=iterations)])
+                results.append([test[0], test[1], 'csc', timeit.timeit(lambda: insert_col_test_helper(csc, test[2]()), number=iterations)])
 
 
     def test_update(iterations):
@@ -169,6 +173,7 @@ if __name__ == '__main__':
             array = test_case['array']
             linked_list = test_case['linked_list']
             csr = test_case['csr']
+            csc = test_case['csc']
 
             last_row = int(rows) - 1
             last_col = int(cols) - 1
@@ -190,6 +195,85 @@ if __name__ == '__main__':
                 results.append([test[0], test[1], 'array', timeit.timeit(lambda: update_test_helper(array, test[2](), test[3](), update_value), number=iterations)])
                 results.append([test[0], test[1], 'linked_list', timeit.timeit(lambda: update_test_helper(linked_list, test[2](), test[3](), update_value), number=iterations)])
                 results.append([test[0], test[1], 'csr', timeit.timeit(lambda: update_test_helper(csr, test[2](), test[3](), update_value), number=iterations)])
+                results.append([test[0], test[1], 'csc', timeit.timeit(lambda: update_test_helper(csc, test[2](), test[3](), update_value), number=iterations)])
+
+    def test_update_many(iterations, batch_size):
+        for test_case in test_cases:
+            (rows, cols, fill_percent, min_val, max_val) = test_case['filename'].split('_')
+
+            last_row = int(rows) - 1
+            last_col = int(cols) - 1
+            update_value = 55           # exact number should not matter
+
+            # same random batches for both ways of updating, made up front so making them isn't timed
+            batches = [[Cell(random.randint(0, last_row), random.randint(0, last_col), update_value) for _ in range(batch_size)]
+                       for _ in range(iterations)]
+
+            def looped_update_helper(spreadsheet, batch):
+                for cell in batch:
+                    spreadsheet.update(cell.row, cell.col, cell.val)
+
+            def update_many_helper(spreadsheet, batch):
+                spreadsheet.updateMany(batch)
+
+            data_desc = f'R {rows}, C {cols}, ~{fill_percent} filled, {iterations} iterations'
+
+            # action names don't start with 'update', so the cost model keeps to the single update timings
+            tests = [
+                [f'batch update: looped, {batch_size} cells', data_desc, looped_update_helper],
+                [f'batch update: updateMany, {batch_size} cells', data_desc, update_many_helper]
+            ]
+
+            for test in tests:
+                print('executing: ', test[0], '\t', test[1])
+                for implementation in ['array', 'linked_list', 'csr', 'csc']:
+                    # each way of updating starts from the data file, not from the cells the other one wrote
+                    spreadsheet = fresh_spreadsheet(test_case['filename'], implementation)
+                    batch_iter = iter(batches)
+                    results.append([test[0], test[1], implementation, timeit.timeit(lambda: test[2](spreadsheet, next(batch_iter)), number=iterations)])
+
+    def test_insert_many(iterations, block_size):
+        for test_case in test_cases:
+            (rows, cols, fill_percent, min_val, max_val) = test_case['filename'].split('_')
+
+            last_row = int(rows) - 1
+            last_col = int(cols) - 1
+
+            def looped_insert_rows_helper(spreadsheet, row):
+                for _ in range(block_size):
+                    spreadsheet.insertRow(row)
+
+            def insert_rows_helper(spreadsheet, row):
+                spreadsheet.insertRows(row, block_size)
+
+            def looped_insert_cols_helper(spreadsheet, col):
+                for _ in range(block_size):
+                    spreadsheet.insertCol(col)
+
+            def insert_cols_helper(spreadsheet, col):
+                spreadsheet.insertCols(col, block_size)
+
+            data_desc = f'R {rows}, C {cols}, ~{fill_percent} filled, {iterations} iterations'
+
+            # same random positions for both ways of inserting, made up front so making them isn't timed
+            row_positions = [random.randint(0, last_row) for _ in range(iterations)]
+            col_positions = [random.randint(0, last_col) for _ in range(iterations)]
+
+            # action names don't start with 'insert', so the cost model keeps to the single insert timings
+            tests = [
+                [f'block insert: rows looped, {block_size} rows',           data_desc, looped_insert_rows_helper, row_positions],
+                [f'block insert: insertRows, {block_size} rows',            data_desc, insert_rows_helper,        row_positions],
+                [f'block insert: cols looped, {block_size} cols',           data_desc, looped_insert_cols_helper, col_positions],
+                [f'block insert: insertCols, {block_size} cols',            data_desc, insert_cols_helper,        col_positions]
+            ]
+
+            for test in tests:
+                print('executing: ', test[0], '\t', test[1])
+                for implementation in ['array', 'linked_list', 'csr', 'csc']:
+                    # each way of inserting starts from the data file, not from a sheet the other one grew
+                    spreadsheet = fresh_spreadsheet(test_case['filename'], implementation)
+                    position_iter = iter(test[3])
+                    results.append([test[0], test[1], implementation, timeit.timeit(lambda: test[2](spreadsheet, next(position_iter)), number=iterations)])
 
     def compare_entries():
        for test_case in test_cases:
@@ -198,14 +282,33 @@ if __name__ == '__main__':
             array = test_case['array']
             linked_list = test_case['linked_list']
             csr = test_case['csr']
+            csc = test_case['csc']
 
             data_desc = f'R {rows}, C {cols}, ~{fill_percent} filled'
 
             entries_out.append([data_desc, 'array', array.entries()])
             entries_out.append([data_desc, 'linked_list', linked_list.entries()])
             entries_out.append([data_desc, 'csr', csr.entries()])
+            entries_out.append([data_desc, 'csc', csc.entries()])
             
 
+    def object_size(obj):
+        # getsizeof doesn't count an instance __dict__, so add it when there is one
+        size = sys.getsizeof(obj)
+        if hasattr(obj, '__dict__'):
+            size += sys.getsizeof(obj.__dict__)
+        return size
+
+    def report_object_sizes():
+        print('Per-object sizes (bytes):')
+        objects = [
+            ['Cell',                Cell(0, 0, 0.0)],
+            ['linked list Node',    Node(Cell(0, 0, 0.0))],
+            ['DoubleLinkedList',    DoubleLinkedList()]
+        ]
+        for name, obj in objects:
+            print(f'\t{name:20}\t{object_size(obj)}')
+
     def generate_data_files():
         print('Generating new data files...')
 
@@ -223,6 +326,7 @@ if __name__ == '__main__':
         remove_data_files()
         generate_data_files()
     
+        report_object_sizes()
         print('Starting tests...')
 
         if (get_data_files()):
@@ -230,6 +334,8 @@ if __name__ == '__main__':
             test_find(100)
             test_insert(100)
             test_update(100)
+            test_update_many(100, 1000)
+            test_insert_many(10, 100)
             
         # create a new file for writing
         t = str(time.time())